@@ -199,8 +199,6 @@ class AnnouncementProcessor:
     
     async def _handle_timer_announcement(self, guild: discord.Guild, category_id: int, announcement):
         """Handle timer start announcement - starts timer and announces it immediately."""
-        import json
-        
         # Get announce channel
         session = await self.session_manager.get_session(guild.id, category_id)
         announce_channel = await self._get_announce_channel(guild, session, category_id)
@@ -214,9 +212,12 @@ class AnnouncementProcessor:
         if isinstance(data, str):
             try:
                 data = json.loads(data)
-            except:
+            except ValueError:
                 logger.error(f"Failed to parse data: {data}")
                 return
+        if not isinstance(data, dict):
+            logger.error(f"Unexpected timer announcement data: {data!r}")
+            return
         
         duration = data.get('duration', 0)
         
@@ -318,17 +319,7 @@ class AnnouncementProcessor:
         custom_name = game.get('custom_name', '')
         display_name = custom_name if custom_name else script
         
-        # Parse players
-        players_data = game['players']
-        if isinstance(players_data, str):
-            try:
-                players_list = json.loads(players_data)
-            except:
-                players_list = []
-        elif isinstance(players_data, list):
-            players_list = players_data
-        else:
-            players_list = []
+        players_list = game['players'] or []
         
         embed = discord.Embed(
             title=f"{EMOJI_TOWN_SQUARE} A New Tale Begins",
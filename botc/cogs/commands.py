@@ -60,6 +60,27 @@ def load_changelog():
         return []
 
 
+def append_player_activity(timestamp: int, player_count: int) -> None:
+    """Append a (timestamp, player_count) entry to player_activity_log.json.
+
+    Blocking file I/O; call it through asyncio.to_thread from async code.
+    """
+    activity_log_path = (
+        Path(__file__).resolve().parent.parent.parent / "player_activity_log.json"
+    )
+    # Load existing log or start new
+    if activity_log_path.exists():
+        with open(activity_log_path, "r") as f:
+            activity_log = json.load(f)
+    else:
+        activity_log = []
+    activity_log.append([timestamp, player_count])
+    # Optionally, keep only the last 1000 entries
+    activity_log = activity_log[-1000:]
+    with open(activity_log_path, "w") as f:
+        json.dump(activity_log, f)
+
+
 changelog_data = load_changelog()
 
 
@@ -1010,23 +1031,10 @@ class Commands(commands.Cog):
 
             # --- Player activity logging ---
             try:
-                activity_log_path = (
-                    Path(__file__).resolve().parent.parent.parent
-                    / "player_activity_log.json"
+                # File I/O runs in a worker thread so the gateway loop never blocks on disk
+                await asyncio.to_thread(
+                    append_player_activity, int(time.time()), len(players)
                 )
-                now = int(time.time())
-                player_count = len(players)
-                # Load existing log or start new
-                if activity_log_path.exists():
-                    with open(activity_log_path, "r") as f:
-                        activity_log = json.load(f)
-                else:
-                    activity_log = []
-                activity_log.append([now, player_count])
-                # Optionally, keep only the last 1000 entries
-                activity_log = activity_log[-1000:]
-                with open(activity_log_path, "w") as f:
-                    json.dump(activity_log, f)
             except Exception as e:
                 logger.warning(f"Failed to log player activity: {e}")
 
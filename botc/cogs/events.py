@@ -313,6 +313,8 @@ class EventHandlers(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         """Handle voice state updates for channel cap management and shadow followers."""
+        # Voice membership changed, so cached poll mentions for this guild are stale
+        self.bot.invalidate_active_players(member.guild.id)
         try:
             name = self.bot.get_member_name(member)
             check_name = self.bot.strip_brb_prefix(name)
@@ -414,6 +416,8 @@ class EventHandlers(commands.Cog):
         try:
             if before.nick == after.nick:
                 return
+            # Prefix changes decide who counts as a player
+            self.bot.invalidate_active_players(after.guild.id)
             change_key = (after.id, after.nick)
             bot_initiated_nick_changes = self.bot.bot_initiated_nick_changes
             if change_key in bot_initiated_nick_changes:
@@ -5,7 +5,7 @@ import logging
 import discord
 from discord.ext import commands
 
-from botc.polls import create_poll_internal, _end_poll
+from botc.polls import create_poll_internal, _end_poll, cancel_poll, record_poll_reaction
 from botc.constants import DELETE_DELAY_ERROR, DELETE_DELAY_NORMAL
 
 logger = logging.getLogger('botc_bot')
@@ -15,7 +15,7 @@ class Polls(commands.Cog):
     """Cog that handles message-based poll commands (e.g., `*poll`).
 
     This cog expects the main `bot` to expose the following attributes:
-      - bot.get_active_players(guild) -> list[str]
+      - bot.get_active_player_mention_text(guild, channel) -> str
       - bot.is_storyteller(member) -> bool
 
     The heavy lifting for poll creation and ending lives in `botc.polls`.
@@ -24,6 +24,21 @@ class Polls(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        # A deleted poll can't be tallied; stop its end task instead of letting it sleep
+        cancel_poll(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if self.bot.user and payload.user_id == self.bot.user.id:
+            return
+        record_poll_reaction(payload.message_id, str(payload.emoji), payload.user_id, added=True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        record_poll_reaction(payload.message_id, str(payload.emoji), payload.user_id, added=False)
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
         # Keep out of other bots' messages
@@ -75,11 +90,11 @@ class Polls(commands.Cog):
             try:
                 # Create async wrapper that passes the channel
                 async def get_players_with_channel(guild):
-                    get_active_players = getattr(self.bot, "get_active_players", None)
-                    if not get_active_players:
-                        logger.error("get_active_players not found on bot")
-                        return []
-                    return await get_active_players(guild, message.channel)
+                    get_mention_text = getattr(self.bot, "get_active_player_mention_text", None)
+                    if not get_mention_text:
+                        logger.error("get_active_player_mention_text not found on bot")
+                        return ""
+                    return await get_mention_text(guild, message.channel)
                 
                 poll_msg, unique_options, emoji_map, script_map, poll_duration = await create_poll_internal(
                     message.guild,
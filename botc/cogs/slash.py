@@ -3,7 +3,6 @@ from __future__ import annotations
 import logging
 import asyncio
 import re
-import json
 from typing import List
 import discord
 from discord import app_commands
@@ -482,8 +481,8 @@ class SlashCog(commands.Cog):
             try:
                 # Create async wrapper that passes the channel
                 async def get_players_with_channel(guild):
-                    get_active_players = getattr(self.bot, "get_active_players")
-                    return await get_active_players(guild, interaction.channel)
+                    get_mention_text = getattr(self.bot, "get_active_player_mention_text")
+                    return await get_mention_text(guild, interaction.channel)
                 
                 poll_msg, unique_options, emoji_map, script_map, poll_duration = await create_poll_internal(
                     interaction.guild,
@@ -784,14 +783,14 @@ class SlashCog(commands.Cog):
             
             try:
                 # Update profile (bot-wide)
-                success = await db.set_storyteller_profile(
+                profile = await db.set_storyteller_profile(
                     interaction.user.id,
                     pronouns,
                     custom_title,
                     color_theme.lower() if color_theme else None
                 )
                 
-                if success:
+                if profile:
                     # Build confirmation message
                     updates = []
                     if pronouns:
@@ -910,7 +909,7 @@ class SlashCog(commands.Cog):
                     return
 
                 # Get current players
-                current_players = json.loads(active_game.get("players", "[]")) if isinstance(active_game.get("players"), str) else active_game.get("players", [])
+                current_players = list(active_game["players"] or [])
 
                 # Check if player already in game
                 if player.id in current_players:
@@ -996,7 +995,7 @@ class SlashCog(commands.Cog):
                     return
                 
                 # Get current players
-                current_players = json.loads(active_game.get("players", "[]")) if isinstance(active_game.get("players"), str) else active_game.get("players", [])
+                current_players = list(active_game["players"] or [])
                 
                 # Check if player in game
                 if player.id not in current_players:
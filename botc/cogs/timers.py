@@ -138,18 +138,7 @@ class Timers(commands.Cog):
                         return
                     
                     # Cancel previous timer if exists
-                    prev = timer_manager.scheduled_timers.get(message.guild.id)
-                    if prev:
-                        try:
-                            prev["task"].cancel()
-                        except Exception:
-                            pass
-                        try:
-                            if prev.get("announce_msg"):
-                                await prev["announce_msg"].delete()
-                        except Exception:
-                            pass
-                        timer_manager.scheduled_timers.pop(message.guild.id, None)
+                    if timer_manager.cancel_timer(message.guild.id):
                         await timer_manager.save_timers()
                     
                     # Set new timer
@@ -177,11 +166,11 @@ class Timers(commands.Cog):
                     msg = await message.channel.send("⏱️ No timer currently running.")
                     await msg.delete(delay=DELETE_DELAY_INFO)
                     return
-                remaining = int(info["end_time"] - time.time())
+                remaining = int(info.end_time - time.time())
                 if remaining < 0:
                     remaining = 0
                 human = humanize_seconds(remaining)
-                endt = format_end_time(info["end_time"])
+                endt = format_end_time(info.end_time)
                 msg = await message.channel.send(f"⏳ Active timer: {human} remaining (ends at {endt}).")
                 await msg.delete(delay=DELETE_DELAY_INFO)
                 return
@@ -283,18 +272,7 @@ class Timers(commands.Cog):
             if not await self._require_active_game(message):
                 return
                 
-            prev = timer_manager.scheduled_timers.get(message.guild.id)
-            if prev:
-                try:
-                    prev["task"].cancel()
-                except Exception:
-                    logger.exception("Failed to cancel previous timer task")
-                try:
-                    if prev.get("announce_msg"):
-                        await prev["announce_msg"].delete()
-                except Exception:
-                    logger.exception("Failed to delete previous timer announce message")
-                timer_manager.scheduled_timers.pop(message.guild.id, None)
+            if timer_manager.cancel_timer(message.guild.id):
                 await timer_manager.save_timers()
                 cancel_msg = await message.channel.send("⏱️ Previous timer cancelled - setting new timer...")
                 await cancel_msg.delete(delay=DELETE_DELAY_NORMAL)
@@ -93,18 +93,7 @@ class VoiceCommands(commands.Cog):
             timer_manager = getattr(self.bot, "timer_manager", None)
             if timer_manager:
                 try:
-                    info = timer_manager.scheduled_timers.get(message.guild.id)
-                    if info:
-                        try:
-                            info["task"].cancel()
-                        except Exception:
-                            logger.exception("Failed to cancel existing timer task")
-                        try:
-                            if info.get("announce_msg"):
-                                await info["announce_msg"].delete()
-                        except Exception:
-                            logger.exception("Failed to delete existing timer announce message")
-                        timer_manager.scheduled_timers.pop(message.guild.id, None)
+                    if timer_manager.cancel_timer(message.guild.id):
                         await timer_manager.save_timers()
                         m = await message.channel.send("⏱️ Existing timer cancelled; executing call now.")
                         await m.delete(delay=DELETE_DELAY_NORMAL)
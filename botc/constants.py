@@ -38,6 +38,8 @@ DEFAULT_POLL_DURATION = 300
 MAX_POLL_DURATION = MAX_DURATION_SECONDS
 COMMAND_COOLDOWN_SECONDS = 2
 COMMAND_COOLDOWN_LONG = 30
+MAX_CONCURRENT_GAME_HANDLERS = 4
+ACTIVE_PLAYERS_CACHE_TTL = 30
 MAX_NICK_LENGTH = 32
 
 DELETABLE_COMMANDS = [
@@ -106,4 +108,4 @@ POLL_EMOJI_MAP = {
     'h': '🇭'
 }
 
-POLL_VALID_OPTIONS = set('123ch')
+POLL_VALID_OPTIONS = frozenset('123ch')
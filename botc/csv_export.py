@@ -49,15 +49,12 @@ async def generate_player_csv(db: 'Database', bot: 'discord.Client', player_disc
             # For legacy games without game_players entries, check if player was in the game
             if rows and not rows[0]['starting_role_name']:
                 game = rows[0]
-                players_json = await conn.fetchval(
+                players = await conn.fetchval(
                     "SELECT players FROM games WHERE game_id = $1",
                     game_id
                 )
-                if players_json:
-                    import json
-                    players = json.loads(players_json) if isinstance(players_json, str) else players_json
-                    if player_discord_id not in players:
-                        rows = []  # Player wasn't in this game
+                if players and player_discord_id not in players:
+                    rows = []  # Player wasn't in this game
         else:
             # All games export - include both game_players entries and legacy games
             query = """
@@ -75,7 +72,7 @@ async def generate_player_csv(db: 'Database', bot: 'discord.Client', player_disc
                     gp.final_team
                 FROM games g
                 LEFT JOIN game_players gp ON g.game_id = gp.game_id AND gp.discord_id = $1
-                WHERE (gp.discord_id = $1 OR (g.players IS NOT NULL AND g.players::jsonb @> to_jsonb($1::bigint)))
+                WHERE (gp.discord_id = $1 OR (g.players @> ARRAY[$1::bigint]))
                 AND g.is_active = FALSE
                 ORDER BY g.start_time DESC
             """
@@ -4,13 +4,24 @@ This module provides async PostgreSQL database operations using asyncpg.
 """
 from __future__ import annotations
 
+import asyncio
 import asyncpg
 import logging
 import json
-from typing import Optional, List, Dict, Any
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Iterator
 from pathlib import Path
 
 from .exceptions import DatabaseError
+from .session import Session
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger('botc_bot')
 
@@ -18,6 +29,184 @@ logger = logging.getLogger('botc_bot')
 DEFAULT_POOL_MIN_SIZE = 2
 DEFAULT_POOL_MAX_SIZE = 10
 DEFAULT_COMMAND_TIMEOUT = 60
+# Prepared statements kept per connection (asyncpg default is 100)
+DEFAULT_STATEMENT_CACHE_SIZE = 1024
+# Recycle idle connections above min_size after this many seconds
+DEFAULT_MAX_INACTIVE_LIFETIME = 300.0
+# Admin role sets are re-read after this many seconds (other instances may edit them)
+ADMIN_ROLES_CACHE_TTL = 60.0
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+# Explicit column projections for hot reads (avoid SELECT *)
+GUILD_COLUMNS = "guild_id, botc_category_id, grimoire_link, language"
+TIMER_COLUMNS = "guild_id, end_time, creator_id, category_id"
+# Restored timers carry their session's announce channel so startup needs no per-timer session reads
+TIMERS_WITH_ANNOUNCE_SQL = (
+    "SELECT t.guild_id, t.end_time, t.creator_id, t.category_id, s.announce_channel_id "
+    "FROM timers t LEFT JOIN sessions s "
+    "ON s.guild_id = t.guild_id AND s.category_id = t.category_id"
+)
+GAME_COLUMNS = (
+    "game_id, guild_id, category_id, script, custom_name, start_time, end_time, "
+    "winner, players, player_count, storyteller_id, is_active, completed_at"
+)
+# Game listings skip the players array; use get_game_detail() for the full row
+GAME_HISTORY_COLUMNS = (
+    "game_id, guild_id, category_id, script, custom_name, start_time, end_time, "
+    "winner, player_count, storyteller_id, completed_at"
+)
+
+# Prebuilt SQL for the game history / active game variants
+HISTORY_ALL_SQL = (
+    f"SELECT {GAME_HISTORY_COLUMNS} FROM games "
+    "WHERE guild_id = $1 AND is_active = FALSE ORDER BY completed_at DESC"
+)
+HISTORY_ALL_LIMIT_SQL = HISTORY_ALL_SQL + " LIMIT $2"
+HISTORY_CATEGORY_SQL = (
+    f"SELECT {GAME_HISTORY_COLUMNS} FROM games "
+    "WHERE guild_id = $1 AND category_id = $2 AND is_active = FALSE ORDER BY completed_at DESC"
+)
+HISTORY_CATEGORY_LIMIT_SQL = HISTORY_CATEGORY_SQL + " LIMIT $3"
+ACTIVE_GAME_SQL = f"SELECT {GAME_COLUMNS} FROM games WHERE guild_id = $1 AND is_active = TRUE"
+ACTIVE_GAME_CATEGORY_SQL = (
+    f"SELECT {GAME_COLUMNS} FROM games WHERE guild_id = $1 AND category_id = $2 AND is_active = TRUE"
+)
+
+# Hot session/profile/language statements. asyncpg prepares each distinct query
+# text once per connection and reuses it from its statement cache, so these
+# must stay byte-for-byte stable.
+SESSION_SELECT_SQL = "SELECT * FROM sessions WHERE guild_id = $1 AND category_id = $2"
+SESSION_UPDATE_SQL = """UPDATE sessions SET
+    destination_channel_id = $3,
+    grimoire_link = $4,
+    exception_channel_id = $5,
+    announce_channel_id = $6,
+    active_game_id = $7,
+    storyteller_user_id = $8,
+    last_active = $9,
+    vc_caps = $10,
+    session_code = $11
+WHERE guild_id = $1 AND category_id = $2"""
+SESSION_LINK_GAME_SQL = """UPDATE sessions SET
+    active_game_id = $3,
+    storyteller_user_id = $4,
+    last_active = $5
+WHERE guild_id = $1 AND category_id = $2
+RETURNING *"""
+SESSION_CODE_MAX_SQL = """SELECT MAX(substring(session_code FROM 2)::int)
+FROM sessions
+WHERE session_code ~ '^s[0-9]+$'"""
+SESSION_CODE_BACKFILL_SQL = """WITH base AS (
+    SELECT COALESCE(MAX(substring(session_code FROM 2)::int), 0) AS n
+    FROM sessions
+    WHERE session_code ~ '^s[0-9]+$'
+), missing AS (
+    SELECT guild_id, category_id,
+           row_number() OVER (ORDER BY created_at, guild_id, category_id) AS rn
+    FROM sessions
+    WHERE session_code IS NULL
+)
+UPDATE sessions
+SET session_code = 's' || (base.n + missing.rn)
+FROM base, missing
+WHERE sessions.guild_id = missing.guild_id AND sessions.category_id = missing.category_id"""
+LANGUAGE_SELECT_SQL = "SELECT language FROM guilds WHERE guild_id = $1"
+LANGUAGE_UPDATE_SQL = "UPDATE guilds SET language = $2 WHERE guild_id = $1"
+PROFILE_SELECT_SQL = """SELECT pronouns, custom_title, color_theme, created_at, updated_at
+FROM storyteller_profiles_global
+WHERE user_id = $1"""
+PROFILE_UPSERT_SQL = """INSERT INTO storyteller_profiles_global (user_id, pronouns, custom_title, color_theme, updated_at)
+VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
+ON CONFLICT (user_id)
+DO UPDATE SET
+    pronouns = COALESCE($2, storyteller_profiles_global.pronouns),
+    custom_title = COALESCE($3, storyteller_profiles_global.custom_title),
+    color_theme = COALESCE($4, storyteller_profiles_global.color_theme),
+    updated_at = CURRENT_TIMESTAMP
+RETURNING pronouns, custom_title, color_theme, created_at, updated_at"""
+PROFILE_CLEAR_FIELD_SQL = """UPDATE storyteller_profiles_global SET
+    pronouns = CASE WHEN $2 = 'pronouns' THEN NULL ELSE pronouns END,
+    custom_title = CASE WHEN $2 = 'custom_title' THEN NULL ELSE custom_title END,
+    color_theme = CASE WHEN $2 = 'color_theme' THEN NULL ELSE color_theme END,
+    updated_at = CURRENT_TIMESTAMP
+WHERE user_id = $1"""
+
+# Storyteller stats deltas: $1 guild_id, $2 storyteller_id, $3 winner, $4 minutes.
+# The winner is branched on in SQL so one static statement covers every game.
+STATS_INCREMENT_SQL = """INSERT INTO storyteller_stats (
+    guild_id, storyteller_id,
+    games_run, good_wins, evil_wins, total_minutes
+) VALUES ($1, $2, 1,
+    CASE WHEN $3 = 'Good' THEN 1 ELSE 0 END,
+    CASE WHEN $3 = 'Evil' THEN 1 ELSE 0 END,
+    $4
+)
+ON CONFLICT (guild_id, storyteller_id) DO UPDATE SET
+    games_run = storyteller_stats.games_run + 1,
+    good_wins = storyteller_stats.good_wins + CASE WHEN $3 = 'Good' THEN 1 ELSE 0 END,
+    evil_wins = storyteller_stats.evil_wins + CASE WHEN $3 = 'Evil' THEN 1 ELSE 0 END,
+    total_minutes = storyteller_stats.total_minutes + $4"""
+STATS_DECREMENT_SQL = """UPDATE storyteller_stats SET
+    games_run = GREATEST(games_run - 1, 0),
+    good_wins = GREATEST(good_wins - d.good, 0),
+    evil_wins = GREATEST(evil_wins - d.evil, 0),
+    total_minutes = GREATEST(total_minutes - $4, 0)
+FROM (SELECT ($3 = 'Good')::int AS good, ($3 = 'Evil')::int AS evil) AS d
+WHERE guild_id = $1 AND storyteller_id = $2"""
+
+
+# JSONB binary wire format is a version byte followed by the JSON text, so the
+# codec exchanges bytes directly (no str encode/decode round-trip).
+_JSONB_VERSION = b'\x01'
+
+if ORJSON_AVAILABLE:
+    def _jsonb_encode(value: Any) -> bytes:
+        # OPT_NON_STR_KEYS: vc_caps is keyed by int channel IDs
+        return _JSONB_VERSION + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def _jsonb_decode(data: bytes) -> Any:
+        return orjson.loads(memoryview(data)[1:])
+else:
+    def _jsonb_encode(value: Any) -> bytes:
+        return _JSONB_VERSION + json.dumps(value).encode()
+
+    def _jsonb_decode(data: bytes) -> Any:
+        return json.loads(data[1:])
+
+
+def _affected(tag: str) -> int:
+    """Row count from an asyncpg command tag like 'DELETE 7'."""
+    return int(tag.rpartition(' ')[2])
+
+
+def _vc_caps_from_db(value: Optional[Dict[str, int]]) -> Dict[int, int]:
+    """Convert decoded vc_caps JSONB (string channel IDs) back to int keys."""
+    return {int(k): v for k, v in value.items()} if value else {}
+
+
+def _session_from_row(row: asyncpg.Record) -> Session:
+    """Build a Session from a sessions row in one pass.
+    
+    Columns the Session dataclass doesn't model (session_id, town_square_channel_id)
+    are skipped.
+    """
+    fields = Session.__dataclass_fields__
+    return Session(**{
+        k: (_vc_caps_from_db(v) if k == 'vc_caps' else v)
+        for k, v in row.items() if k in fields
+    })
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Register codecs so JSONB columns map to/from Python objects."""
+    await conn.set_type_codec(
+        'jsonb',
+        encoder=_jsonb_encode,
+        decoder=_jsonb_decode,
+        schema='pg_catalog',
+        format='binary'
+    )
 
 
 class Database:
@@ -36,6 +225,15 @@ class Database:
         self.max_size = max_size
         self.timeout = timeout
         self.pool: Optional[asyncpg.Pool] = None
+        # DND users cached in-process, kept fresh via LISTEN dnd_change (None = not cached)
+        self._dnd_cache: Optional[set[int]] = None
+        # Guild rows cached in-process, invalidated via LISTEN guild_change (None = not cached)
+        self._guild_cache: Optional[Dict[int, Dict[str, Any]]] = None
+        # In-flight guild reads, so concurrent misses share one query
+        self._guild_pending: Dict[int, asyncio.Future] = {}
+        # guild_id -> (admin role ids, read_at); dropped locally on add/remove
+        self._admin_roles_cache: Dict[int, tuple[frozenset[int], float]] = {}
+        self._listener_conn: Optional[asyncpg.Connection] = None
     
     async def connect(self) -> None:
         """Create database connection pool."""
@@ -44,7 +242,10 @@ class Database:
                 self.connection_string,
                 min_size=self.min_size,
                 max_size=self.max_size,
-                command_timeout=self.timeout
+                command_timeout=self.timeout,
+                statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE,
+                max_inactive_connection_lifetime=DEFAULT_MAX_INACTIVE_LIFETIME,
+                init=_init_connection
             )
             logger.info(f"Database connection pool created (min={self.min_size}, max={self.max_size})")
         except (asyncpg.PostgresError, OSError) as e:
@@ -53,49 +254,96 @@ class Database:
     
     async def close(self) -> None:
         """Close database connection pool."""
+        await self._stop_cache_listener()
         if self.pool:
             await self.pool.close()
             logger.info("Database connection pool closed")
     
     async def initialize_schema(self) -> None:
         """Initialize database schema from consolidated migration file."""
-        migrations_dir = Path(__file__).parent.parent / "migrations"
+        schema_file = MIGRATIONS_DIR / "012_complete_schema_update.sql"
         
-        # Check if schema already exists (check for guilds table)
         try:
             async with self.pool.acquire() as conn:
-                schema_exists = await conn.fetchval(
-                    "SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'guilds')"
-                )
+                # to_regclass is a cheap catalog lookup (no information_schema scan)
+                schema_missing = await conn.fetchval("SELECT to_regclass('public.guilds') IS NULL")
                 
-                if schema_exists:
+                if schema_missing:
+                    # Run consolidated schema
+                    if not schema_file.exists():
+                        logger.error(f"Schema file not found: {schema_file}")
+                        return
+                    await conn.execute(schema_file.read_text())
+                    logger.info("Database schema initialized successfully")
+                else:
                     logger.info("Database schema already exists, running additional migrations")
-                    # Run additional migrations
-                    await self._run_migrations(migrations_dir, conn)
-                    return
-        except Exception as e:
-            logger.warning(f"Error checking schema existence: {e}")
-        
-        # Run consolidated schema
-        schema_file = migrations_dir / "012_complete_schema_update.sql"
-        if not schema_file.exists():
-            logger.error(f"Schema file not found: {schema_file}")
-            return
-        
-        try:
-            async with self.pool.acquire() as conn:
-                with open(schema_file, 'r') as f:
-                    schema_sql = f.read()
-                
-                await conn.execute(schema_sql)
-                logger.info("Database schema initialized successfully")
                 
                 # Run additional migrations
-                await self._run_migrations(migrations_dir, conn)
+                await self._run_migrations(MIGRATIONS_DIR, conn)
         except Exception as e:
             logger.error(f"Schema initialization failed: {e}")
             # Don't raise - allow bot to continue
     
+    async def start_cache_listener(self) -> None:
+        """Enable the DND and guild caches and keep them fresh via LISTEN/NOTIFY.
+        
+        Uses a dedicated connection outside the pool. On failure the caches stay
+        disabled and lookups fall back to querying the database.
+        """
+        try:
+            self._listener_conn = await asyncpg.connect(self.connection_string)
+            self._listener_conn.add_termination_listener(self._on_listener_terminated)
+            await self._listener_conn.add_listener('dnd_change', self._on_dnd_change)
+            await self._listener_conn.add_listener('guild_change', self._on_guild_change)
+            rows = await self._listener_conn.fetch("SELECT user_id FROM dnd_users")
+            self._dnd_cache = {row['user_id'] for row in rows}
+            self._guild_cache = {}
+            logger.info(f"DND cache loaded ({len(self._dnd_cache)} users)")
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Caches disabled, falling back to queries: {e}")
+            await self._stop_cache_listener()
+    
+    async def _stop_cache_listener(self) -> None:
+        """Close the listener connection and disable the caches."""
+        self._dnd_cache = None
+        self._guild_cache = None
+        conn, self._listener_conn = self._listener_conn, None
+        if conn and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.debug(f"Error closing cache listener connection: {e}")
+    
+    def _on_dnd_change(self, conn, pid: int, channel: str, payload: str) -> None:
+        """Apply a dnd_change notification ('+user_id' or '-user_id') to the cache."""
+        if self._dnd_cache is None:
+            return
+        try:
+            user_id = int(payload[1:])
+        except ValueError:
+            logger.warning(f"Ignoring malformed dnd_change payload: {payload!r}")
+            return
+        if payload[0] == '+':
+            self._dnd_cache.add(user_id)
+        else:
+            self._dnd_cache.discard(user_id)
+    
+    def _on_guild_change(self, conn, pid: int, channel: str, payload: str) -> None:
+        """Drop a guild from the cache when its row changes (payload is the guild_id)."""
+        if self._guild_cache is None:
+            return
+        try:
+            self._invalidate_guild(int(payload))
+        except ValueError:
+            logger.warning(f"Ignoring malformed guild_change payload: {payload!r}")
+    
+    def _on_listener_terminated(self, conn) -> None:
+        """Stop trusting the caches once we can no longer receive notifications."""
+        logger.warning("Cache listener connection lost, falling back to queries")
+        self._dnd_cache = None
+        self._guild_cache = None
+        self._listener_conn = None
+    
     async def _run_migrations(self, migrations_dir: Path, conn) -> None:
         """Run numbered migration files that haven't been applied yet."""
         # Get all migration files except 001 (base schema) and 012 (consolidated schema for fresh installs)
@@ -134,40 +382,65 @@ class Database:
     # Guild operations
     async def get_guild(self, guild_id: int) -> Optional[Dict[str, Any]]:
         """Get guild configuration."""
+        if self._guild_cache is None:
+            return await self._fetch_guild(guild_id)
+        if guild_id in self._guild_cache:
+            return dict(self._guild_cache[guild_id])
+        
+        # Concurrent misses for the same guild share one query
+        future = self._guild_pending.get(guild_id)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_guild(guild_id))
+            self._guild_pending[guild_id] = future
+            future.add_done_callback(lambda f: self._release_guild_read(guild_id, f))
+        
+        guild = await asyncio.shield(future)
+        return dict(guild) if guild else None
+    
+    async def _fetch_guild(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Read a guild row, caching it unless it was invalidated mid-read."""
+        pending = self._guild_pending.get(guild_id)
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM guilds WHERE guild_id = $1",
+                f"SELECT {GUILD_COLUMNS} FROM guilds WHERE guild_id = $1",
                 guild_id
             )
-            return dict(row) if row else None
+        if not row:
+            return None
+        guild = dict(row)
+        if self._guild_cache is not None and pending is not None and self._guild_pending.get(guild_id) is pending:
+            self._guild_cache[guild_id] = guild
+        return guild
+    
+    def _release_guild_read(self, guild_id: int, future: asyncio.Future) -> None:
+        """Forget a finished in-flight read (unless it was already replaced)."""
+        if self._guild_pending.get(guild_id) is future:
+            del self._guild_pending[guild_id]
+    
+    def _invalidate_guild(self, guild_id: int) -> None:
+        """Drop a cached guild row and detach any read already in flight."""
+        self._guild_pending.pop(guild_id, None)
+        if self._guild_cache is not None:
+            self._guild_cache.pop(guild_id, None)
     
     async def upsert_guild(self, guild_id: int, **kwargs) -> None:
-        """Insert or update guild configuration."""
-        fields = ['botc_category_id']
-        
-        provided_fields = [field for field in fields if field in kwargs]
-        values = [kwargs[field] for field in provided_fields]
-        
-        if not provided_fields:
-            async with self.pool.acquire() as conn:
-                await conn.execute(
-                    "INSERT INTO guilds (guild_id) VALUES ($1) ON CONFLICT DO NOTHING",
-                    guild_id
-                )
-            return
-        
-        insert_fields = ', '.join(provided_fields)
-        insert_placeholders = ', '.join(f'${i+2}' for i in range(len(values)))
-        update_set = ', '.join(f"{field} = ${i+2}" for i, field in enumerate(provided_fields))
-        
-        query = f"""
-            INSERT INTO guilds (guild_id, {insert_fields})
-            VALUES ($1, {insert_placeholders})
-            ON CONFLICT (guild_id) DO UPDATE SET {update_set}
+        """Insert or update guild configuration.
+
+        Omitted (or None) fields keep their existing value.
         """
-        
         async with self.pool.acquire() as conn:
-            await conn.execute(query, guild_id, *values)
+            # An existing row is only rewritten when there is something to set, so
+            # bare "ensure the guild exists" calls stay no-ops (no NOTIFY, no invalidation)
+            result = await conn.execute(
+                """INSERT INTO guilds (guild_id, botc_category_id)
+                   VALUES ($1, $2)
+                   ON CONFLICT (guild_id) DO UPDATE SET
+                       botc_category_id = EXCLUDED.botc_category_id
+                   WHERE EXCLUDED.botc_category_id IS NOT NULL""",
+                guild_id, kwargs.get('botc_category_id')
+            )
+        if _affected(result) > 0:
+            self._invalidate_guild(guild_id)
     
     # Shadow follower operations
     async def get_followers(self, target_id: int, guild_id: int) -> List[int]:
@@ -182,11 +455,10 @@ class Database:
     async def get_follow_target(self, follower_id: int, guild_id: int) -> Optional[int]:
         """Get the target that a follower is following."""
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
+            return await conn.fetchval(
                 "SELECT target_id FROM shadow_followers WHERE follower_id = $1 AND guild_id = $2",
                 follower_id, guild_id
             )
-            return row['target_id'] if row else None
     
     async def add_follower(self, follower_id: int, target_id: int, guild_id: int) -> None:
         """Add a shadow follower relationship."""
@@ -198,6 +470,22 @@ class Database:
                 follower_id, target_id, guild_id
             )
     
+    async def add_followers_bulk(self, rows: List[tuple[int, int, int]]) -> None:
+        """Add many shadow follower relationships in one pipelined batch.
+        
+        Args:
+            rows: List of (follower_id, target_id, guild_id) tuples
+        """
+        if not rows:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """INSERT INTO shadow_followers (follower_id, target_id, guild_id, created_at)
+                   VALUES ($1, $2, $3, NOW())
+                   ON CONFLICT (follower_id, guild_id) DO UPDATE SET target_id = $2, created_at = NOW()""",
+                rows
+            )
+    
     async def remove_follower(self, follower_id: int, guild_id: int) -> None:
         """Remove a shadow follower relationship."""
         async with self.pool.acquire() as conn:
@@ -210,26 +498,36 @@ class Database:
         """Get all shadow follower relationships for a guild. Returns {target_id: [follower_ids]}."""
         async with self.pool.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT target_id, follower_id FROM shadow_followers WHERE guild_id = $1",
+                """SELECT target_id, array_agg(follower_id) AS follower_ids
+                   FROM shadow_followers WHERE guild_id = $1
+                   GROUP BY target_id""",
                 guild_id
             )
-            result = {}
-            for row in rows:
-                target_id = row['target_id']
-                if target_id not in result:
-                    result[target_id] = []
-                result[target_id].append(row['follower_id'])
-            return result
+            return {row['target_id']: list(row['follower_ids']) for row in rows}
     
     # DND operations
     async def is_dnd(self, user_id: int) -> bool:
         """Check if user has DND enabled."""
+        if self._dnd_cache is not None:
+            return user_id in self._dnd_cache
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT 1 FROM dnd_users WHERE user_id = $1",
+            return await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM dnd_users WHERE user_id = $1)",
                 user_id
             )
-            return row is not None
+    
+    async def filter_dnd(self, user_ids: List[int]) -> set[int]:
+        """Return the subset of user_ids that have DND enabled, in one query."""
+        if not user_ids:
+            return set()
+        if self._dnd_cache is not None:
+            return self._dnd_cache.intersection(user_ids)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT user_id FROM dnd_users WHERE user_id = ANY($1::bigint[])",
+                user_ids
+            )
+            return {row['user_id'] for row in rows}
     
     async def set_dnd(self, user_id: int, enabled: bool) -> None:
         """Enable or disable DND for a user."""
@@ -244,22 +542,51 @@ class Database:
                     "DELETE FROM dnd_users WHERE user_id = $1",
                     user_id
                 )
+        # Apply locally right away; the trigger's NOTIFY will confirm it
+        if self._dnd_cache is not None:
+            if enabled:
+                self._dnd_cache.add(user_id)
+            else:
+                self._dnd_cache.discard(user_id)
+    
+    async def set_dnd_bulk(self, user_ids: List[int], enabled: bool) -> None:
+        """Enable or disable DND for many users in one pipelined batch."""
+        if not user_ids:
+            return
+        async with self.pool.acquire() as conn:
+            if enabled:
+                await conn.executemany(
+                    "INSERT INTO dnd_users (user_id) VALUES ($1) ON CONFLICT DO NOTHING",
+                    [(user_id,) for user_id in user_ids]
+                )
+            else:
+                await conn.executemany(
+                    "DELETE FROM dnd_users WHERE user_id = $1",
+                    [(user_id,) for user_id in user_ids]
+                )
+        if self._dnd_cache is not None:
+            if enabled:
+                self._dnd_cache.update(user_ids)
+            else:
+                self._dnd_cache.difference_update(user_ids)
     
     async def get_all_dnd_users(self) -> List[int]:
         """Get all users with DND enabled."""
+        if self._dnd_cache is not None:
+            return list(self._dnd_cache)
         async with self.pool.acquire() as conn:
             rows = await conn.fetch("SELECT user_id FROM dnd_users")
             return [row['user_id'] for row in rows]
     
     # Timer operations
-    async def get_timer(self, guild_id: int) -> Optional[Dict[str, Any]]:
+    async def get_timer(self, guild_id: int) -> Optional[asyncpg.Record]:
         """Get active timer for a guild."""
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM timers WHERE guild_id = $1",
+                f"SELECT {TIMER_COLUMNS} FROM timers WHERE guild_id = $1",
                 guild_id
             )
-            return dict(row) if row else None
+            return row
     
     async def save_timer(self, guild_id: int, end_time: float, creator_id: int, category_id: int = None) -> None:
         """Save or update timer for a guild.
@@ -278,6 +605,22 @@ class Database:
                 guild_id, end_time, creator_id, category_id
             )
     
+    async def save_timers_bulk(self, items: List[tuple]) -> None:
+        """Save or update many timers in one batch.
+        
+        Args:
+            items: (guild_id, end_time, creator_id, category_id) tuples
+        """
+        if not items:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """INSERT INTO timers (guild_id, end_time, creator_id, category_id)
+                   VALUES ($1, $2, $3, $4)
+                   ON CONFLICT (guild_id) DO UPDATE SET end_time = $2, creator_id = $3, category_id = $4""",
+                items
+            )
+    
     async def delete_timer(self, guild_id: int) -> None:
         """Delete timer for a guild."""
         async with self.pool.acquire() as conn:
@@ -286,15 +629,25 @@ class Database:
                 guild_id
             )
     
-    async def get_all_timers(self) -> List[Dict[str, Any]]:
-        """Get all active timers."""
+    async def delete_timers_bulk(self, guild_ids: List[int]) -> None:
+        """Delete timers for many guilds in one statement."""
+        if not guild_ids:
+            return
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM timers")
-            return [dict(row) for row in rows]
+            await conn.execute(
+                "DELETE FROM timers WHERE guild_id = ANY($1::bigint[])",
+                guild_ids
+            )
+    
+    async def get_all_timers(self) -> List[asyncpg.Record]:
+        """Get all active timers along with their session's announce_channel_id (NULL if none)."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(TIMERS_WITH_ANNOUNCE_SQL)
+            return rows
     
     # Game operations
     async def start_game(self, guild_id: int, script: str, custom_name: str, 
-                        start_time: float, players: List[str], storyteller_id: int = None, category_id: int = None) -> int:
+                        start_time: float, players: List[int], storyteller_id: int = None, category_id: int = None) -> int:
         """Start a new game and return game_id.
         
         Args:
@@ -309,30 +662,32 @@ class Database:
         Returns:
             game_id of the created game
         """
+        # End any existing active game in this session and create the new game
+        # in one statement
+        if category_id:
+            query = """WITH deactivated AS (
+                           UPDATE games SET is_active = FALSE
+                           WHERE guild_id = $1 AND category_id = $2 AND is_active = TRUE
+                       )
+                       INSERT INTO games (guild_id, category_id, script, custom_name, start_time, players, player_count, is_active, storyteller_id)
+                       VALUES ($1, $2, $3, $4, $5, $6, $7, TRUE, $8)
+                       RETURNING game_id"""
+        else:
+            query = """WITH deactivated AS (
+                           UPDATE games SET is_active = FALSE
+                           WHERE guild_id = $1 AND is_active = TRUE
+                       )
+                       INSERT INTO games (guild_id, category_id, script, custom_name, start_time, players, player_count, is_active, storyteller_id)
+                       VALUES ($1, $2, $3, $4, $5, $6, $7, TRUE, $8)
+                       RETURNING game_id"""
+
         async with self.pool.acquire() as conn:
-            # End any existing active game in this session
-            if category_id:
-                await conn.execute(
-                    """UPDATE games SET is_active = FALSE 
-                       WHERE guild_id = $1 AND category_id = $2 AND is_active = TRUE""",
-                    guild_id, category_id
-                )
-            else:
-                await conn.execute(
-                    "UPDATE games SET is_active = FALSE WHERE guild_id = $1 AND is_active = TRUE",
-                    guild_id
-                )
-            
-            # Create new game - convert players list to JSON for JSONB column
-            row = await conn.fetchrow(
-                """INSERT INTO games (guild_id, category_id, script, custom_name, start_time, players, player_count, is_active, storyteller_id)
-                   VALUES ($1, $2, $3, $4, $5, $6::jsonb, $7, TRUE, $8)
-                   RETURNING game_id""",
-                guild_id, category_id, script, custom_name or None, start_time, json.dumps(players), len(players), storyteller_id
+            return await conn.fetchval(
+                query,
+                guild_id, category_id, script, custom_name or None, start_time, players, len(players), storyteller_id
             )
-            return row['game_id']
     
-    async def end_game(self, guild_id: int, end_time: float, winner: str, category_id: int = None) -> Optional[Dict[str, Any]]:
+    async def end_game(self, guild_id: int, end_time: float, winner: str, category_id: int = None) -> Optional[asyncpg.Record]:
         """End active game and return the game record.
         
         Args:
@@ -342,64 +697,54 @@ class Database:
             category_id: Optional category ID for session-scoped games
         
         Returns:
-            Game record dict if found, None otherwise
+            Game record if found, None otherwise
         """
         async with self.pool.acquire() as conn:
-            if category_id:
-                row = await conn.fetchrow(
-                    """UPDATE games 
-                       SET end_time = $2, winner = $3, is_active = FALSE, completed_at = NOW()
-                       WHERE guild_id = $1 AND category_id = $4 AND is_active = TRUE
-                       RETURNING *""",
-                    guild_id, end_time, winner, category_id
-                )
-            else:
-                row = await conn.fetchrow(
-                    """UPDATE games 
-                       SET end_time = $2, winner = $3, is_active = FALSE, completed_at = NOW()
-                       WHERE guild_id = $1 AND is_active = TRUE
-                       RETURNING *""",
-                    guild_id, end_time, winner
-                )
-            game = dict(row) if row else None
+            async with conn.transaction():
+                if category_id:
+                    row = await conn.fetchrow(
+                        """UPDATE games 
+                           SET end_time = $2, winner = $3, is_active = FALSE, completed_at = NOW()
+                           WHERE guild_id = $1 AND category_id = $4 AND is_active = TRUE
+                           RETURNING *""",
+                        guild_id, end_time, winner, category_id
+                    )
+                else:
+                    row = await conn.fetchrow(
+                        """UPDATE games 
+                           SET end_time = $2, winner = $3, is_active = FALSE, completed_at = NOW()
+                           WHERE guild_id = $1 AND is_active = TRUE
+                           RETURNING *""",
+                        guild_id, end_time, winner
+                    )
+                game = row
             
-            # Clear active_game_id from session (match pattern in cancel_game/delete_game)
-            if game:
-                await conn.execute(
-                    "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = $2",
-                    guild_id, game['game_id']
-                )
+                # Clear active_game_id from session (match pattern in cancel_game/delete_game)
+                if game:
+                    await conn.execute(
+                        "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = $2",
+                        guild_id, game['game_id']
+                    )
             
-            # Update storyteller stats if game completed successfully and has storyteller
-            if game and winner in ('Good', 'Evil') and game.get('storyteller_id'):
-                # Calculate game duration in seconds
-                game_duration = int(end_time - game.get('start_time', end_time))
-                
-                # Get player count from players list
-                players_data = game.get('players', [])
-                if isinstance(players_data, str):
-                    try:
-                        import json
-                        players_list = json.loads(players_data)
-                    except:
-                        players_list = []
-                elif isinstance(players_data, list):
-                    players_list = players_data
-                else:
-                    players_list = []
+                # Update storyteller stats if game completed successfully and has storyteller
+                if game and winner in ('Good', 'Evil') and game.get('storyteller_id'):
+                    # Calculate game duration in seconds
+                    game_duration = int(end_time - game.get('start_time', end_time))
                 
-                player_count = len(players_list)
+                    # Get player count from players list
+                    player_count = len(game['players'] or [])
                 
-                await self._update_storyteller_stats(
-                    guild_id=guild_id,
-                    storyteller_id=game['storyteller_id'],
-                    script=game['script'],
-                    winner=winner,
-                    game_duration=game_duration,
-                    player_count=player_count
-                )
+                    await self._update_storyteller_stats(
+                        conn,
+                        guild_id=guild_id,
+                        storyteller_id=game['storyteller_id'],
+                        script=game['script'],
+                        winner=winner,
+                        game_duration=game_duration,
+                        player_count=player_count
+                    )
             
-            return game
+                return game
     
     async def cancel_game(self, guild_id: int, category_id: int = None) -> None:
         """Cancel (delete) active game without recording in history.
@@ -452,7 +797,7 @@ class Database:
                     guild_id
                 )
     
-    async def get_active_game(self, guild_id: int, category_id: int = None) -> Optional[Dict[str, Any]]:
+    async def get_active_game(self, guild_id: int, category_id: int = None) -> Optional[asyncpg.Record]:
         """Get the active game for a guild or session.
         
         Args:
@@ -460,20 +805,14 @@ class Database:
             category_id: Optional category ID for session-scoped games
         
         Returns:
-            Active game record dict if found, None otherwise
+            Active game record if found, None otherwise
         """
         async with self.pool.acquire() as conn:
             if category_id:
-                row = await conn.fetchrow(
-                    "SELECT * FROM games WHERE guild_id = $1 AND category_id = $2 AND is_active = TRUE",
-                    guild_id, category_id
-                )
+                row = await conn.fetchrow(ACTIVE_GAME_CATEGORY_SQL, guild_id, category_id)
             else:
-                row = await conn.fetchrow(
-                    "SELECT * FROM games WHERE guild_id = $1 AND is_active = TRUE",
-                    guild_id
-                )
-            return dict(row) if row else None
+                row = await conn.fetchrow(ACTIVE_GAME_SQL, guild_id)
+            return row
     
     async def update_game_players(self, guild_id: int, player_ids: List[int], category_id: int = None) -> bool:
         """Update the player list for an active game.
@@ -492,20 +831,20 @@ class Database:
                     """UPDATE games 
                        SET players = $1, player_count = $2 
                        WHERE guild_id = $3 AND category_id = $4 AND is_active = TRUE""",
-                    json.dumps(player_ids), len(player_ids), guild_id, category_id
+                    player_ids, len(player_ids), guild_id, category_id
                 )
             else:
                 result = await conn.execute(
                     """UPDATE games 
                        SET players = $1, player_count = $2 
                        WHERE guild_id = $3 AND is_active = TRUE""",
-                    json.dumps(player_ids), len(player_ids), guild_id
+                    player_ids, len(player_ids), guild_id
                 )
             
             # Check if any row was updated
-            return result.split()[-1] != '0'
+            return _affected(result) > 0
     
-    async def get_game_history(self, guild_id: int, limit: int = None, category_id: int = None) -> List[Dict[str, Any]]:
+    async def get_game_history(self, guild_id: int, limit: int = None, category_id: int = None) -> List[asyncpg.Record]:
         """Get game history for a guild, optionally filtered by category.
         
         Args:
@@ -514,105 +853,125 @@ class Database:
             category_id: Optional category ID to filter session-specific history
             
         Returns:
-            List of game records, newest first
+            List of game records (without players), newest first
+        
+        For unbounded reads prefer iter_game_history(), which streams rows.
         """
-        async with self.pool.acquire() as conn:
-            if category_id is not None:
-                # Session-scoped history
-                if limit is not None:
-                    rows = await conn.fetch(
-                        """SELECT * FROM games 
-                           WHERE guild_id = $1 AND category_id = $2 AND is_active = FALSE 
-                           ORDER BY completed_at DESC 
-                           LIMIT $3""",
-                        guild_id, category_id, limit
-                    )
-                else:
-                    rows = await conn.fetch(
-                        """SELECT * FROM games 
-                           WHERE guild_id = $1 AND category_id = $2 AND is_active = FALSE 
-                           ORDER BY completed_at DESC""",
-                        guild_id, category_id
-                    )
+        if category_id is not None:
+            # Session-scoped history
+            if limit is not None:
+                sql, args = HISTORY_CATEGORY_LIMIT_SQL, (guild_id, category_id, limit)
             else:
-                # All games across all sessions
-                if limit is not None:
-                    rows = await conn.fetch(
-                        """SELECT * FROM games 
-                           WHERE guild_id = $1 AND is_active = FALSE 
-                           ORDER BY completed_at DESC 
-                           LIMIT $2""",
-                        guild_id, limit
-                    )
-                else:
-                    rows = await conn.fetch(
-                        """SELECT * FROM games 
-                           WHERE guild_id = $1 AND is_active = FALSE 
-                           ORDER BY completed_at DESC""",
-                        guild_id
-                    )
-            return [dict(row) for row in rows]
+                sql, args = HISTORY_CATEGORY_SQL, (guild_id, category_id)
+        else:
+            # All games across all sessions
+            if limit is not None:
+                sql, args = HISTORY_ALL_LIMIT_SQL, (guild_id, limit)
+            else:
+                sql, args = HISTORY_ALL_SQL, (guild_id,)
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+            return rows
+    
+    async def iter_game_history(self, guild_id: int, category_id: int = None, prefetch: int = 200):
+        """Stream game history for a guild without materializing every row.
+        
+        Args:
+            guild_id: Discord guild ID
+            category_id: Optional category ID to filter session-specific history
+            prefetch: Number of rows fetched per cursor round-trip
+            
+        Yields:
+            Game records (without players), newest first
+        """
+        if category_id is not None:
+            query, args = HISTORY_CATEGORY_SQL, (guild_id, category_id)
+        else:
+            query, args = HISTORY_ALL_SQL, (guild_id,)
+        
+        async with self.pool.acquire() as conn:
+            # Cursors require a transaction
+            async with conn.transaction():
+                async for row in conn.cursor(query, *args, prefetch=prefetch):
+                    yield row
+    
+    async def get_game_detail(self, game_id: int, guild_id: int) -> Optional[asyncpg.Record]:
+        """Get the full record (including players) for a single game.
+        
+        Args:
+            game_id: The game ID to fetch
+            guild_id: The guild ID (ensures game belongs to this server)
+            
+        Returns:
+            Game record if found, None otherwise
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT {GAME_COLUMNS} FROM games WHERE game_id = $1 AND guild_id = $2",
+                game_id, guild_id
+            )
+            return row
     
     async def get_game_stats(self, guild_id: int) -> Dict[str, Any]:
         """Get game statistics for a guild."""
         async with self.pool.acquire() as conn:
-            stats = await conn.fetchrow(
-                """SELECT 
-                    COUNT(*) as total_games,
-                    COUNT(*) FILTER (WHERE winner = 'Good') as good_wins,
-                    COUNT(*) FILTER (WHERE winner = 'Evil') as evil_wins
-                   FROM games 
-                   WHERE guild_id = $1 AND is_active = FALSE AND winner IN ('Good', 'Evil')""",
-                guild_id
-            )
-            
-            # Get most played scripts
-            scripts = await conn.fetch(
-                """SELECT script, COUNT(*) as count
-                   FROM games 
-                   WHERE guild_id = $1 AND is_active = FALSE
-                   GROUP BY script
-                   ORDER BY count DESC
-                   LIMIT 3""",
+            # Counts and most played scripts in a single round-trip
+            row = await conn.fetchrow(
+                """WITH s AS (
+                       SELECT
+                           COUNT(*) as total_games,
+                           COUNT(*) FILTER (WHERE winner = 'Good') as good_wins,
+                           COUNT(*) FILTER (WHERE winner = 'Evil') as evil_wins
+                       FROM games
+                       WHERE guild_id = $1 AND is_active = FALSE AND winner IN ('Good', 'Evil')
+                   ), t AS (
+                       SELECT script, COUNT(*) as count
+                       FROM games
+                       WHERE guild_id = $1 AND is_active = FALSE
+                       GROUP BY script
+                       ORDER BY count DESC
+                       LIMIT 3
+                   )
+                   SELECT
+                       (SELECT to_jsonb(s) FROM s) AS stats,
+                       (SELECT jsonb_agg(t ORDER BY t.count DESC) FROM t) AS scripts""",
                 guild_id
             )
-            
+
+            # JSONB columns come back decoded by the connection codec
+            stats = row['stats']
+            scripts = row['scripts'] or []
+
             return {
                 'total_games': stats['total_games'],
                 'good_wins': stats['good_wins'],
                 'evil_wins': stats['evil_wins'],
-                'scripts': [(row['script'], row['count']) for row in scripts]
+                'scripts': [(s['script'], s['count']) for s in scripts]
             }
     
-    async def delete_game(self, guild_id: int, index: int) -> Optional[Dict[str, Any]]:
+    async def delete_game(self, guild_id: int, index: int) -> Optional[asyncpg.Record]:
         """Delete a specific game by index (1-based, newest first). Returns deleted game."""
         async with self.pool.acquire() as conn:
-            # Get the game_id at that index
-            row = await conn.fetchrow(
-                """SELECT game_id FROM games 
-                   WHERE guild_id = $1 AND is_active = FALSE
-                   ORDER BY completed_at DESC
-                   OFFSET $2 LIMIT 1""",
-                guild_id, index - 1
-            )
-            
-            if not row:
-                return None
-            
-            game_id = row['game_id']
-            
-            # Clear active_game_id from any sessions referencing this game
-            await conn.execute(
-                "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = $2",
-                guild_id, game_id
-            )
-            
-            # Delete and return the game
+            # Resolve the game_id at that index, clear session references to it,
+            # and delete it in a single statement
             deleted = await conn.fetchrow(
-                "DELETE FROM games WHERE game_id = $1 RETURNING *",
-                game_id
+                """WITH target AS (
+                       SELECT game_id FROM games
+                       WHERE guild_id = $1 AND is_active = FALSE
+                       ORDER BY completed_at DESC
+                       OFFSET $2 LIMIT 1
+                   ), cleared AS (
+                       UPDATE sessions SET active_game_id = NULL
+                       FROM target
+                       WHERE sessions.guild_id = $1 AND sessions.active_game_id = target.game_id
+                   )
+                   DELETE FROM games USING target
+                   WHERE games.game_id = target.game_id
+                   RETURNING games.*""",
+                guild_id, index - 1
             )
-            return dict(deleted) if deleted else None
+            return deleted
     
     async def delete_game_by_id(self, game_id: int, guild_id: int) -> bool:
         """Delete a specific game by game_id for a specific guild. Returns True if deleted.
@@ -624,55 +983,81 @@ class Database:
             guild_id: The guild ID (ensures game belongs to this server)
         """
         async with self.pool.acquire() as conn:
-            # First, get the game data before deleting to update stats
-            game = await conn.fetchrow(
-                "SELECT * FROM games WHERE game_id = $1 AND guild_id = $2",
-                game_id, guild_id
-            )
-            
-            if not game:
-                return False
-            
-            # Clear active_game_id from any sessions referencing this game
-            await conn.execute(
-                "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = $2",
-                guild_id, game_id
-            )
-            
-            # Delete announcements first (foreign key constraint)
-            await conn.execute(
-                "DELETE FROM announcements WHERE game_id = $1",
-                game_id
-            )
-            
-            # Delete the game
-            result = await conn.execute(
-                "DELETE FROM games WHERE game_id = $1 AND guild_id = $2",
-                game_id, guild_id
-            )
-            
-            deleted = int(result.split()[-1]) > 0 if result else False
-            
-            # If deletion succeeded and game has storyteller stats, update them
-            if deleted and game['storyteller_id'] and game['winner'] in ('Good', 'Evil'):
-                # Calculate game duration
-                game_duration = 0
-                if game['end_time'] and game['start_time']:
-                    game_duration = int(game['end_time'] - game['start_time'])
+            async with conn.transaction():
+                # Clear active_game_id from any sessions referencing this game
+                await conn.execute(
+                    "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = $2",
+                    guild_id, game_id
+                )
+
+                # Delete announcements first (foreign key constraint), scoped to this guild's game
+                await conn.execute(
+                    """DELETE FROM announcements
+                       WHERE game_id = (SELECT game_id FROM games WHERE game_id = $1 AND guild_id = $2)""",
+                    game_id, guild_id
+                )
+
+                # Delete the game and get its data back in the same round-trip
+                game = await conn.fetchrow(
+                    "DELETE FROM games WHERE game_id = $1 AND guild_id = $2 RETURNING *",
+                    game_id, guild_id
+                )
+
+                if not game:
+                    return False
+
+                # If game has storyteller stats, update them
+                if game['storyteller_id'] and game['winner'] in ('Good', 'Evil'):
+                    # Calculate game duration
+                    game_duration = 0
+                    if game['end_time'] and game['start_time']:
+                        game_duration = int(game['end_time'] - game['start_time'])
                 
-                player_count = game.get('player_count', 0) or 0
+                    player_count = game.get('player_count', 0) or 0
                 
-                # Subtract from storyteller stats
-                await self._decrement_storyteller_stats(
-                    guild_id,
-                    game['storyteller_id'],
-                    game['script'],
-                    game['winner'],
-                    game_duration,
-                    player_count
-                )
+                    # Subtract from storyteller stats
+                    await self._decrement_storyteller_stats(
+                        conn,
+                        guild_id,
+                        game['storyteller_id'],
+                        game['script'],
+                        game['winner'],
+                        game_duration,
+                        player_count
+                    )
             
-            return deleted
+                return True
+    
+    async def delete_games_by_ids(self, game_ids: List[int], guild_id: int) -> int:
+        """Delete several games for a guild in one transaction. Returns count deleted.
+        
+        Storyteller stats are decremented for every deleted game in a single batch.
+        
+        Args:
+            game_ids: The game IDs to delete
+            guild_id: The guild ID (ensures games belong to this server)
+        """
+        if not game_ids:
+            return 0
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "UPDATE sessions SET active_game_id = NULL WHERE guild_id = $1 AND active_game_id = ANY($2::int[])",
+                    guild_id, game_ids
+                )
+                await conn.execute(
+                    """DELETE FROM announcements
+                       WHERE game_id IN (SELECT game_id FROM games WHERE game_id = ANY($1::int[]) AND guild_id = $2)""",
+                    game_ids, guild_id
+                )
+                games = await conn.fetch(
+                    """DELETE FROM games WHERE game_id = ANY($1::int[]) AND guild_id = $2
+                       RETURNING storyteller_id, winner, start_time, end_time""",
+                    game_ids, guild_id
+                )
+                await self._decrement_storyteller_stats_many(conn, guild_id, games)
+                return len(games)
     
     async def clear_game_history(self, guild_id: int) -> int:
         """Clear all game history for a guild. Returns count of deleted games."""
@@ -695,7 +1080,7 @@ class Database:
                 guild_id
             )
             # Parse "DELETE N" response
-            return int(result.split()[-1]) if result else 0
+            return _affected(result) if result else 0
     
     async def delete_short_games(self, guild_id: int, max_duration_minutes: int) -> int:
         """Delete games shorter than specified duration. Returns count of deleted games."""
@@ -736,15 +1121,16 @@ class Database:
                 game_ids
             )
             
-            return int(result.split()[-1]) if result else 0
+            return _affected(result) if result else 0
     
     # Storyteller stats operations
-    async def _update_storyteller_stats(self, guild_id: int, storyteller_id: int, 
+    async def _update_storyteller_stats(self, conn: asyncpg.Connection, guild_id: int, storyteller_id: int, 
                                        script: str, winner: str, game_duration: int = 0, 
                                        player_count: int = 0) -> None:
         """Internal method to update storyteller statistics after a game.
         
         Args:
+            conn: Connection to run on (caller's transaction)
             guild_id: Discord guild ID
             storyteller_id: Discord user ID of storyteller
             script: Script name
@@ -752,68 +1138,78 @@ class Database:
             game_duration: Game duration in seconds
             player_count: Number of players in the game
         """
-        async with self.pool.acquire() as conn:
-            game_minutes = game_duration // 60
-            await conn.execute("""
-                INSERT INTO storyteller_stats (
-                    guild_id, storyteller_id,
-                    games_run, good_wins, evil_wins, total_minutes
-                ) VALUES ($1, $2, 1,
-                    CASE WHEN $3 = 'Good' THEN 1 ELSE 0 END,
-                    CASE WHEN $3 = 'Evil' THEN 1 ELSE 0 END,
-                    $4
-                )
-                ON CONFLICT (guild_id, storyteller_id) DO UPDATE SET
-                    games_run = storyteller_stats.games_run + 1,
-                    good_wins = storyteller_stats.good_wins + CASE WHEN $3 = 'Good' THEN 1 ELSE 0 END,
-                    evil_wins = storyteller_stats.evil_wins + CASE WHEN $3 = 'Evil' THEN 1 ELSE 0 END,
-                    total_minutes = storyteller_stats.total_minutes + $4
-            """, guild_id, storyteller_id, winner, game_minutes)
-    
-    async def _decrement_storyteller_stats(self, guild_id: int, storyteller_id: int,
+        game_minutes = game_duration // 60
+        await conn.execute(STATS_INCREMENT_SQL, guild_id, storyteller_id, winner, game_minutes)
+    
+    async def _decrement_storyteller_stats(self, conn: asyncpg.Connection, guild_id: int, storyteller_id: int,
                                           script: str, winner: str, game_duration: int = 0,
-                                          player_count: int = 0) -> None:
+                                          player_count: int = 0) -> bool:
         """Internal method to decrement storyteller statistics when a game is deleted.
         
         Args:
+            conn: Connection to run on (caller's transaction)
             guild_id: Discord guild ID
             storyteller_id: Discord user ID of storyteller
             script: Script name
             winner: 'Good' or 'Evil'
             game_duration: Game duration in seconds
             player_count: Number of players in the game
-        """
-        async with self.pool.acquire() as conn:
-            # Check if stats exist for this storyteller
-            stats = await conn.fetchrow(
-                "SELECT * FROM storyteller_stats WHERE guild_id = $1 AND storyteller_id = $2",
-                guild_id, storyteller_id
-            )
             
-            if not stats:
-                return  # No stats to update
-
-            game_minutes = game_duration // 60
-            await conn.execute("""
-                UPDATE storyteller_stats SET
-                    games_run = GREATEST(games_run - 1, 0),
-                    good_wins = GREATEST(good_wins - CASE WHEN $3 = 'Good' THEN 1 ELSE 0 END, 0),
-                    evil_wins = GREATEST(evil_wins - CASE WHEN $3 = 'Evil' THEN 1 ELSE 0 END, 0),
-                    total_minutes = GREATEST(total_minutes - $4, 0)
-                WHERE guild_id = $1 AND storyteller_id = $2
-            """, guild_id, storyteller_id, winner, game_minutes)
-    
-    async def get_storyteller_stats(self, guild_id: int = None) -> List[Dict[str, Any]]:
+        Returns:
+            True if a stats row was updated, False if the storyteller had none
+        """
+        game_minutes = game_duration // 60
+        result = await conn.execute(STATS_DECREMENT_SQL, guild_id, storyteller_id, winner, game_minutes)
+        return _affected(result) > 0
+    
+    async def _decrement_storyteller_stats_many(self, conn: asyncpg.Connection, guild_id: int,
+                                               games: List[asyncpg.Record]) -> None:
+        """Decrement storyteller statistics for several deleted games in one batch.
+        
+        Args:
+            conn: Connection to run on (caller's transaction)
+            guild_id: Discord guild ID
+            games: Deleted game rows (storyteller_id, winner, start_time, end_time)
+        """
+        rows = [
+            (guild_id, game['storyteller_id'], game['winner'],
+             int(game['end_time'] - game['start_time']) // 60 if game['end_time'] and game['start_time'] else 0)
+            for game in games
+            if game['storyteller_id'] and game['winner'] in ('Good', 'Evil')
+        ]
+        if rows:
+            await conn.executemany(STATS_DECREMENT_SQL, rows)
+    
+    async def get_storyteller_stats(self, guild_id: int = None, storyteller_id: int = None,
+                                    limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get storyteller statistics, optionally filtered by guild.
         
         Args:
             guild_id: Optional guild ID to filter by. If None, returns bot-wide stats.
+            storyteller_id: Optional storyteller to aggregate bot-wide stats for. Only
+                that storyteller's rows are summed (via the storyteller_id index)
+                instead of aggregating every storyteller.
+            limit: Maximum number of storytellers to return (None = all)
+            offset: Number of storytellers to skip (for paging)
             
         Returns:
             List of storyteller stats dictionaries, ordered by total games.
         """
         async with self.pool.acquire() as conn:
-            if guild_id is None:
+            if guild_id is None and storyteller_id is not None:
+                rows = await conn.fetch(
+                    """SELECT
+                        storyteller_id,
+                        SUM(games_run) as games_run,
+                        SUM(good_wins) as good_wins,
+                        SUM(evil_wins) as evil_wins,
+                        SUM(total_minutes) as total_minutes
+                    FROM storyteller_stats
+                    WHERE storyteller_id = $1
+                    GROUP BY storyteller_id""",
+                    storyteller_id
+                )
+            elif guild_id is None:
                 rows = await conn.fetch(
                     """SELECT
                         storyteller_id,
@@ -823,14 +1219,17 @@ class Database:
                         SUM(total_minutes) as total_minutes
                     FROM storyteller_stats
                     GROUP BY storyteller_id
-                    ORDER BY SUM(games_run) DESC"""
+                    ORDER BY SUM(games_run) DESC
+                    LIMIT $1 OFFSET $2""",
+                    limit, offset
                 )
             else:
                 rows = await conn.fetch(
                     """SELECT * FROM storyteller_stats
                        WHERE guild_id = $1
-                       ORDER BY games_run DESC""",
-                    guild_id
+                       ORDER BY games_run DESC
+                       LIMIT $2 OFFSET $3""",
+                    guild_id, limit, offset
                 )
             return [dict(row) for row in rows]
     
@@ -839,31 +1238,44 @@ class Database:
         pass  # storyteller_name column not present in current schema
     
     # Session operations
-    async def create_session(self, session) -> None:
-        """Create a new session.
+    async def create_session(self, session: Session) -> Session:
+        """Create a session, or upsert it if the category already has one.
+        
+        On conflict every mutable column is written in the same statement; None
+        fields and an existing session code keep their stored values.
         
         Args:
             session: Session object to create
+            
+        Returns:
+            Session as stored after the upsert
         """
-        import json
         async with self.pool.acquire() as conn:
-            await conn.execute(
+            row = await conn.fetchrow(
                 """INSERT INTO sessions (
                     guild_id, category_id, destination_channel_id, grimoire_link,
                     exception_channel_id, announce_channel_id, active_game_id,
                     storyteller_user_id, created_at, last_active, vc_caps, session_code
                 ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
                 ON CONFLICT (guild_id, category_id) DO UPDATE SET
+                    destination_channel_id = COALESCE(EXCLUDED.destination_channel_id, sessions.destination_channel_id),
+                    grimoire_link = COALESCE(EXCLUDED.grimoire_link, sessions.grimoire_link),
+                    exception_channel_id = COALESCE(EXCLUDED.exception_channel_id, sessions.exception_channel_id),
+                    announce_channel_id = COALESCE(EXCLUDED.announce_channel_id, sessions.announce_channel_id),
+                    active_game_id = COALESCE(EXCLUDED.active_game_id, sessions.active_game_id),
+                    storyteller_user_id = COALESCE(EXCLUDED.storyteller_user_id, sessions.storyteller_user_id),
                     last_active = $10,
                     vc_caps = $11,
-                    session_code = COALESCE(sessions.session_code, $12)""",
+                    session_code = COALESCE(sessions.session_code, $12)
+                RETURNING *""",
                 session.guild_id, session.category_id, session.destination_channel_id,
                 session.grimoire_link, session.exception_channel_id, session.announce_channel_id,
                 session.active_game_id, session.storyteller_user_id, session.created_at, session.last_active,
-                json.dumps(session.vc_caps), session.session_code
+                session.vc_caps, session.session_code
             )
+            return _session_from_row(row)
     
-    async def get_session(self, guild_id: int, category_id: int):
+    async def get_session(self, guild_id: int, category_id: int) -> Optional[Session]:
         """Get a session by guild and category ID.
         
         Args:
@@ -873,65 +1285,69 @@ class Database:
         Returns:
             Session object if found, None otherwise
         """
-        from botc.session import Session
-        import json
-        
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """SELECT * FROM sessions 
-                   WHERE guild_id = $1 AND category_id = $2""",
-                guild_id, category_id
-            )
-            if row:
-                data = dict(row)
-                # Keep only fields the Session dataclass knows about
-                import dataclasses
-                known_fields = {f.name for f in dataclasses.fields(Session)}
-                data = {k: v for k, v in data.items() if k in known_fields}
-                # Parse vc_caps from JSON
-                if 'vc_caps' in data:
-                    if data['vc_caps'] is None:
-                        data['vc_caps'] = {}
-                    elif isinstance(data['vc_caps'], str):
-                        data['vc_caps'] = json.loads(data['vc_caps']) if data['vc_caps'] else {}
-                        # Convert string keys to int keys
-                        if data['vc_caps']:
-                            data['vc_caps'] = {int(k): v for k, v in data['vc_caps'].items()}
-                    elif isinstance(data['vc_caps'], dict):
-                        # asyncpg returns JSONB as dict, convert keys to int
-                        data['vc_caps'] = {int(k): v for k, v in data['vc_caps'].items()} if data['vc_caps'] else {}
-                    else:
-                        data['vc_caps'] = {}
-                else:
-                    data['vc_caps'] = {}
-                return Session(**data)
-            return None
+            row = await conn.fetchrow(SESSION_SELECT_SQL, guild_id, category_id)
+            return _session_from_row(row) if row else None
 
-    async def update_session(self, session) -> None:
+    async def update_session(self, session: Session) -> None:
         """Update an existing session.
         
         Args:
             session: Session object with updated values
         """
-        import json
         async with self.pool.acquire() as conn:
             await conn.execute(
-                """UPDATE sessions SET
-                    destination_channel_id = $3,
-                    grimoire_link = $4,
-                    exception_channel_id = $5,
-                    announce_channel_id = $6,
-                    active_game_id = $7,
-                    storyteller_user_id = $8,
-                    last_active = $9,
-                    vc_caps = $10,
-                    session_code = $11
-                WHERE guild_id = $1 AND category_id = $2""",
+                SESSION_UPDATE_SQL,
                 session.guild_id, session.category_id, session.destination_channel_id,
                 session.grimoire_link, session.exception_channel_id, session.announce_channel_id,
                 session.active_game_id, session.storyteller_user_id, session.last_active,
-                json.dumps(session.vc_caps), session.session_code
+                session.vc_caps, session.session_code
+            )
+    
+    async def get_max_session_code_number(self) -> Optional[int]:
+        """Get the highest N among "sN" session codes across all guilds.
+        
+        Returns:
+            Highest session code number, or None if no session has a code yet
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(SESSION_CODE_MAX_SQL)
+    
+    async def assign_missing_session_codes(self) -> int:
+        """Give every session without a code the next free "sN" codes in one statement.
+        
+        Returns:
+            Number of sessions that were assigned a code
+        """
+        async with self.pool.acquire() as conn:
+            return _affected(await conn.execute(SESSION_CODE_BACKFILL_SQL))
+    
+    async def link_session_game(
+        self,
+        guild_id: int,
+        category_id: int,
+        game_id: Optional[int],
+        storyteller_id: Optional[int],
+        last_active: Any
+    ) -> Optional[Session]:
+        """Point a session at its active game and storyteller in one statement.
+        
+        Args:
+            guild_id: Discord guild ID
+            category_id: Discord category ID
+            game_id: Active game ID to link
+            storyteller_id: User ID of the storyteller running the game
+            last_active: New last_active timestamp
+            
+        Returns:
+            Updated Session, or None if the category has no session
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                SESSION_LINK_GAME_SQL,
+                guild_id, category_id, game_id, storyteller_id, last_active
             )
+            return _session_from_row(row) if row else None
     
     async def delete_session(self, guild_id: int, category_id: int) -> bool:
         """Delete a session.
@@ -970,65 +1386,44 @@ class Database:
             )
             
             # Check if any rows were deleted
-            rows_deleted = int(result.split()[-1]) if result else 0
+            rows_deleted = _affected(result) if result else 0
             return rows_deleted > 0
     
-    async def get_all_sessions_for_guild(self, guild_id: int) -> List:
+    async def get_all_sessions_for_guild(self, guild_id: int, limit: int = None, offset: int = 0) -> List[Session]:
         """Get all sessions for a guild.
         
         Args:
             guild_id: Discord guild ID
+            limit: Maximum number of sessions to return (None = all)
+            offset: Number of sessions to skip (for paging)
             
         Returns:
             List of Session objects
         """
-        from botc.session import Session
-        import json
-        
         async with self.pool.acquire() as conn:
             rows = await conn.fetch(
                 """SELECT * FROM sessions WHERE guild_id = $1
-                   ORDER BY last_active DESC""",
-                guild_id
+                   ORDER BY last_active DESC
+                   LIMIT $2 OFFSET $3""",
+                guild_id, limit, offset
             )
-            sessions = []
-            for row in rows:
-                data = dict(row)
-                # Parse vc_caps from JSON
-                if 'vc_caps' in data:
-                    if data['vc_caps'] is None:
-                        data['vc_caps'] = {}
-                    elif isinstance(data['vc_caps'], str):
-                        data['vc_caps'] = json.loads(data['vc_caps']) if data['vc_caps'] else {}
-                        # Convert string keys to int keys
-                        if data['vc_caps']:
-                            data['vc_caps'] = {int(k): v for k, v in data['vc_caps'].items()}
-                    elif isinstance(data['vc_caps'], dict):
-                        # asyncpg returns JSONB as dict, convert keys to int
-                        data['vc_caps'] = {int(k): v for k, v in data['vc_caps'].items()} if data['vc_caps'] else {}
-                    else:
-                        data['vc_caps'] = {}
-                else:
-                    data['vc_caps'] = {}
-                sessions.append(Session(**data))
-            return sessions
+            return [_session_from_row(row) for row in rows]
     
-    async def delete_inactive_sessions(self, cutoff_timestamp) -> int:
+    async def delete_inactive_sessions(self, cutoff_timestamp) -> List[asyncpg.Record]:
         """Delete sessions that haven't been active since cutoff.
         
         Args:
             cutoff_timestamp: Unix timestamp - delete sessions older than this
             
         Returns:
-            Number of sessions deleted
+            (guild_id, category_id) records of the deleted sessions
         """
         async with self.pool.acquire() as conn:
-            result = await conn.execute(
-                """DELETE FROM sessions WHERE last_active < $1""",
+            return await conn.fetch(
+                """DELETE FROM sessions WHERE last_active < $1
+                   RETURNING guild_id, category_id""",
                 cutoff_timestamp
             )
-            # Extract number from "DELETE N" response
-            return int(result.split()[-1]) if result else 0
 
     # ========================================================================
     # Storyteller Profile Methods
@@ -1044,12 +1439,7 @@ class Database:
             Dict with profile fields or None if not found
         """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """SELECT pronouns, custom_title, color_theme, created_at, updated_at
-                   FROM storyteller_profiles_global
-                   WHERE user_id = $1""",
-                user_id
-            )
+            row = await conn.fetchrow(PROFILE_SELECT_SQL, user_id)
             return dict(row) if row else None
 
     async def set_storyteller_profile(
@@ -1058,7 +1448,7 @@ class Database:
         pronouns: Optional[str] = None,
         custom_title: Optional[str] = None,
         color_theme: Optional[str] = None
-    ) -> bool:
+    ) -> Dict[str, Any]:
         """Create or update storyteller profile (bot-wide).
         
         Args:
@@ -1068,21 +1458,11 @@ class Database:
             color_theme: Color theme name (gold, silver, crimson, etc.)
             
         Returns:
-            True if successful
+            The stored profile after the update (same fields as get_storyteller_profile)
         """
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                """INSERT INTO storyteller_profiles_global (user_id, pronouns, custom_title, color_theme, updated_at)
-                   VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
-                   ON CONFLICT (user_id)
-                   DO UPDATE SET
-                       pronouns = COALESCE($2, storyteller_profiles_global.pronouns),
-                       custom_title = COALESCE($3, storyteller_profiles_global.custom_title),
-                       color_theme = COALESCE($4, storyteller_profiles_global.color_theme),
-                       updated_at = CURRENT_TIMESTAMP""",
-                user_id, pronouns, custom_title, color_theme
-            )
-            return True
+            row = await conn.fetchrow(PROFILE_UPSERT_SQL, user_id, pronouns, custom_title, color_theme)
+            return dict(row)
 
     async def clear_storyteller_profile_field(self, user_id: int, field: str) -> bool:
         """Clear a specific field from storyteller profile (bot-wide).
@@ -1098,12 +1478,7 @@ class Database:
             return False
         
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                f"""UPDATE storyteller_profiles_global
-                    SET {field} = NULL, updated_at = CURRENT_TIMESTAMP
-                    WHERE user_id = $1""",
-                user_id
-            )
+            await conn.execute(PROFILE_CLEAR_FIELD_SQL, user_id, field)
             return True
     
     async def set_guild_language(self, guild_id: int, language: str) -> None:
@@ -1114,12 +1489,8 @@ class Database:
             language: Language code (e.g., 'en', 'es', 'pl', 'ru')
         """
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                """UPDATE guilds
-                   SET language = $2
-                   WHERE guild_id = $1""",
-                guild_id, language
-            )
+            await conn.execute(LANGUAGE_UPDATE_SQL, guild_id, language)
+        self._invalidate_guild(guild_id)
     
     async def get_guild_language(self, guild_id: int) -> str:
         """Get the language for a guild.
@@ -1130,12 +1501,14 @@ class Database:
         Returns:
             Language code (default: 'en')
         """
+        if self._guild_cache is not None:
+            # Served from (and populates) the guild cache
+            guild = await self.get_guild(guild_id)
+            return (guild or {}).get('language') or 'en'
+        
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT language FROM guilds WHERE guild_id = $1",
-                guild_id
-            )
-            return row['language'] if row else 'en'
+            language = await conn.fetchval(LANGUAGE_SELECT_SQL, guild_id)
+            return language or 'en'
 
     # Admin roles management
     async def get_admin_roles(self, guild_id: int) -> List[int]:
@@ -1154,6 +1527,18 @@ class Database:
             )
             return [row['role_id'] for row in rows]
     
+    async def get_admin_role_set(self, guild_id: int) -> frozenset[int]:
+        """Get a guild's admin role IDs as a frozenset, cached for ADMIN_ROLES_CACHE_TTL.
+        
+        is_admin runs on every privileged command, so this avoids a query per check.
+        """
+        cached = self._admin_roles_cache.get(guild_id)
+        if cached and time.monotonic() - cached[1] < ADMIN_ROLES_CACHE_TTL:
+            return cached[0]
+        role_ids = frozenset(await self.get_admin_roles(guild_id))
+        self._admin_roles_cache[guild_id] = (role_ids, time.monotonic())
+        return role_ids
+    
     async def add_admin_role(self, guild_id: int, role_id: int) -> bool:
         """Add a role as an admin role for a guild.
         
@@ -1172,6 +1557,7 @@ class Database:
                        ON CONFLICT (guild_id, role_id) DO NOTHING""",
                     guild_id, role_id
                 )
+                self._admin_roles_cache.pop(guild_id, None)
                 # Check if the insert actually happened
                 result = await conn.fetchval(
                     "SELECT COUNT(*) FROM admin_roles WHERE guild_id = $1 AND role_id = $2",
@@ -1197,8 +1583,9 @@ class Database:
                 "DELETE FROM admin_roles WHERE guild_id = $1 AND role_id = $2",
                 guild_id, role_id
             )
+            self._admin_roles_cache.pop(guild_id, None)
             # Check if any rows were deleted
-            return result.split()[-1] != '0'
+            return _affected(result) > 0
     
     async def is_admin_role(self, guild_id: int, role_id: int) -> bool:
         """Check if a role is an admin role for a guild.
@@ -1222,12 +1609,27 @@ class Database:
 # Global database instance
 db: Optional[Database] = None
 
+# Per-context override (e.g. a test binding its own pool). The global stays the
+# fallback: tasks discord.py spawns don't inherit a ContextVar set in init_db.
+_db_var: ContextVar[Optional[Database]] = ContextVar('db', default=None)
+
 
 def get_db() -> Database:
-    """Get the global database instance."""
-    if db is None:
+    """Get the database bound to the current context, or the global instance."""
+    database = _db_var.get() or db
+    if database is None:
         raise RuntimeError("Database not initialized. Call init_db() first.")
-    return db
+    return database
+
+
+@contextmanager
+def use_db(database: Database) -> Iterator[Database]:
+    """Bind a database for the current context (and tasks created inside it)."""
+    token = _db_var.set(database)
+    try:
+        yield database
+    finally:
+        _db_var.reset(token)
 
 
 async def init_db(connection_string: str) -> Database:
@@ -1236,6 +1638,7 @@ async def init_db(connection_string: str) -> Database:
     db = Database(connection_string)
     await db.connect()
     await db.initialize_schema()
+    await db.start_cache_listener()
     return db
 
 
@@ -7,8 +7,10 @@ from __future__ import annotations
 
 import time
 import random
-import json
+import asyncio
 import logging
+import functools
+from itertools import chain
 from typing import TYPE_CHECKING
 
 import discord
@@ -32,8 +34,9 @@ from botc.constants import (
     DELETE_DELAY_LONG,
     DELETE_DELAY_ERROR,
     COMMAND_COOLDOWN_LONG,
+    MAX_CONCURRENT_GAME_HANDLERS,
 )
-from botc.discord_utils import safe_send_interaction
+from botc.discord_utils import safe_send_interaction, safe_defer
 from botc.exceptions import DatabaseError
 
 if TYPE_CHECKING:
@@ -43,6 +46,64 @@ from botc.utils import strip_st_prefix, add_script_emoji
 
 logger = logging.getLogger('botc_bot')
 
+# Flavour text for /endgame announcements, picked at random per game
+GOOD_WIN_MESSAGES = (
+    "The last whispers of the Demon's manipulation fade away as the sun rises once more. Truth claims its victory over lies and deceit.",
+    "Free from evil, dawn brings justice, and with it comes the end of the Demon's grasp over the village.",
+    "Through unwavering resolve, the townsfolk expose their enemies in the dark. The Demon is cast down, and the village reclaims its peace.",
+    "Good has prevailed! The evil threat is vanquished, and your town lives to see another sunrise.",
+    "As dawn breaks, the final whispers of evil are snuffed out. The townsfolk stand victorious. Bruised, battered, but unbroken.",
+    "Good wins! Turns out teamwork, blind panic, and arguing loudly really does defeat demons.",
+    "The final vote seals the fate of evil. With the demon gone, the village can at last breathe freely. Good triumphs!",
+    "Against all logic, accusations, and five days of utter nonsense, the good team somehow pulls it off. Evil is dead. Enjoy the bragging rights.",
+)
+EVIL_WIN_MESSAGES = (
+    "With the final flicker of hope being extinguished at last, evil tightens its grip. The town's final breath belongs to the Demon.",
+    "As the last ounce of good disappears, silence settles over the cobblestone. The Demon's victory is absolute, and the night belongs to evil.",
+    "The final stand of the good team proves fruitless. In the silence that follows the death of the townsfolk, evil's laughter fills the square.",
+    "Night falls forever. With the final shred of hope extinguished, evil claims the town.",
+    "The demon's plan unfolds flawlessly. As the last good soul falls, darkness tightens its grip. Evil triumphs.",
+    "Evil wins! Turns out lying through your teeth does pay off.",
+    "As dawn breaks, the town falls silent. The Demon's plot is complete, its minions triumphant. With the good dead or deceived beyond recovery, evil claims the final victory in the town square.",
+    "After days of arguing, tunneling, and trusting exactly the wrong people, the town hands victory to evil on a silver platter.",
+)
+
+# Embed field names shared by the /startgame and /endgame announcements
+_F_SCRIPT = f"**{EMOJI_SCRIPT} Script**"
+_F_PLAYERS = f"**{EMOJI_PLAYERS} Players**"
+_F_GATHERED = f"{EMOJI_CANDLE} Gathered in the Square"
+_F_VICTOR = f"**{EMOJI_SWORD} Victor**"
+_F_RESULT = f"**{EMOJI_SWORD} Result**"
+_F_DURATION = f"**{EMOJI_CLOCK} Duration**"
+_F_BEGAN = f"**{EMOJI_CLOCK} Began**"
+
+
+def _field_payload(fields) -> list[dict]:
+    """Turn (name, value, inline) tuples into the field dicts Embed.from_dict expects."""
+    return [{"name": name, "value": value, "inline": inline} for name, value, inline in fields]
+
+
+# Caps how many /startgame and /endgame handlers run at once so a burst of them
+# can't monopolise the event loop and the database pool
+_game_handler_semaphore = asyncio.Semaphore(MAX_CONCURRENT_GAME_HANDLERS)
+
+
+def _bounded(ephemeral: bool = False):
+    """Acknowledge the interaction, then run the game handler under the shared semaphore.
+    
+    The defer comes first so a handler queued behind the semaphore still answers
+    within Discord's 3-second window. An ephemeral defer keeps every followup
+    private, so handlers using it post public results to the channel themselves.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+            await safe_defer(interaction, ephemeral=ephemeral)
+            async with _game_handler_semaphore:
+                return await func(interaction, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 async def call_from_website(guild: discord.Guild, category_id: int, bot):
     """Call townspeople from website trigger."""
@@ -53,6 +114,7 @@ async def call_from_website(guild: discord.Guild, category_id: int, bot):
     return await call_func(guild, category_id)
 
 
+@_bounded()
 async def start_game_handler(
     interaction: discord.Interaction,
     bot,
@@ -105,19 +167,21 @@ async def start_game_handler(
         main_st = None
         co_sts = []
         
-        for vc in botc_category.voice_channels:
-            for vc_member in vc.members:
-                if vc_member.bot:
-                    continue
-                name = vc_member.nick or vc_member.display_name or ""
+        voice_members = chain.from_iterable(vc.members for vc in botc_category.voice_channels)
+        for vc_member in voice_members:
+            if vc_member.bot:
+                continue
+            name = vc_member.display_name
+            
+            if name.startswith(PREFIX_ST):
+                if not main_st:
+                    main_st = vc_member
+            elif name.startswith(PREFIX_COST):
+                co_sts.append(vc_member)
+            else:
+                # Role parsing is only needed once the ST/Co-ST prefixes are ruled out
                 base_name, is_player = bot.get_player_role(vc_member)
-                
-                if name.startswith(PREFIX_ST):
-                    if not main_st:
-                        main_st = vc_member
-                elif name.startswith(PREFIX_COST):
-                    co_sts.append(vc_member)
-                elif is_player:
+                if is_player:
                     players.append((name, base_name))
                     player_ids.append(vc_member.id)
         
@@ -132,11 +196,6 @@ async def start_game_handler(
             )
             return
         
-        # Update snapshot
-        snapshot_key = (guild_id, botc_category.id) if botc_category else (guild_id, None)
-        current_player_ids = set(player_ids)
-        bot.last_player_snapshots[snapshot_key] = current_player_ids
-        
         if not player_ids:
             await safe_send_interaction(
                 interaction,
@@ -144,8 +203,26 @@ async def start_game_handler(
                 ephemeral=True
             )
         
-        # Check if there's already an active game in this category
-        existing_game = await db.get_active_game(guild_id, botc_category.id if botc_category else None)
+        # Check for an active game and record the new one under a per-category lock,
+        # so two concurrent /startgame calls can't both pass the check
+        lock_key = (guild_id, botc_category.id)
+        start_lock = bot.startgame_locks.get(lock_key)
+        if start_lock is None:
+            start_lock = bot.startgame_locks[lock_key] = asyncio.Lock()
+        async with start_lock:
+            existing_game = await db.get_active_game(guild_id, botc_category.id)
+            if not existing_game:
+                storyteller_id = main_st.id
+                game_id = await db.start_game(
+                    guild_id=guild_id,
+                    script=script_value,
+                    custom_name=custom_name.strip() if custom_name else "",
+                    start_time=time.time(),
+                    players=player_ids,
+                    storyteller_id=storyteller_id,
+                    category_id=botc_category.id
+                )
+        
         if existing_game:
             # Calculate how long the game has been running
             current_time = time.time()
@@ -173,35 +250,19 @@ async def start_game_handler(
             )
             return
         
-        # Record game
-        storyteller_id = main_st.id
-        
-        await db.start_game(
-            guild_id=guild_id,
-            script=script_value,
-            custom_name=custom_name.strip() if custom_name else "",
-            start_time=time.time(),
-            players=player_ids,
-            storyteller_id=storyteller_id,
-            category_id=botc_category.id if botc_category else None
-        )
+        # Update snapshot only once the game has actually been recorded
+        snapshot_key = (guild_id, botc_category.id) if botc_category else (guild_id, None)
+        bot.last_player_snapshots[snapshot_key] = set(player_ids)
         
         # Create or update session
         session_manager = bot.session_manager
+        linked_session = None
         if session_manager and botc_category:
             try:
-                # Invalidate cache first to ensure we get fresh data
-                session_manager.invalidate_cache(guild_id=guild_id, category_id=botc_category.id)
-                
-                active_game = await db.get_active_game(guild_id, botc_category.id)
-                game_id = active_game.get("game_id") if active_game else None
-                
-                existing_session = await session_manager.get_session(guild_id, botc_category.id)
-                if existing_session:
-                    existing_session.active_game_id = game_id
-                    existing_session.last_active = time.time()
-                    existing_session.storyteller_user_id = storyteller_id
-                    await session_manager.update_session(existing_session)
+                linked_session = await session_manager.link_active_game(
+                    guild_id, botc_category.id, game_id, storyteller_id
+                )
+                if linked_session:
                     logger.info(f"Session updated for guild {guild_id}, category {botc_category.id}")
                 else:
                     logger.warning(f"No session found for guild {guild_id}, category {botc_category.id}. Game started but session not linked.")
@@ -210,60 +271,44 @@ async def start_game_handler(
         
         # Create announcement embed
         st_name = strip_st_prefix(main_st.display_name)
-        embed = discord.Embed(
-            title=f"{EMOJI_TOWN_SQUARE} A New Tale Begins",
-            description=f"The grimoire opens as shadows gather in the town square...",
-            color=discord.Color.dark_gold(),
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_author(name=f"Storyteller: {st_name}", icon_url=main_st.display_avatar.url)
-        
-        embed.add_field(
-            name=f"**{EMOJI_SCRIPT} Script**",
-            value=f"{add_script_emoji(display_name)}",
-            inline=True
-        )
-        
-        player_display_names = [display_name for (display_name, base_name) in players]
-        
-        embed.add_field(
-            name=f"**{EMOJI_PLAYERS} Players**",
-            value=f"{len(player_display_names)}",
-            inline=True
-        )
-        
-        embed.add_field(name="\u200b", value="\u200b", inline=True)
+        fields = [
+            (_F_SCRIPT, add_script_emoji(display_name), True),
+            (_F_PLAYERS, f"{len(players)}", True),
+            ("\u200b", "\u200b", True),
+        ]
         
         if co_sts:
-            co_st_names = [strip_st_prefix(co.display_name) for co in co_sts]
-            embed.add_field(
-                name="🎭 Co-Storyteller(s)",
-                value=", ".join(co_st_names),
-                inline=False
-            )
-        
-        if len(player_display_names) <= 25:
-            players_text = ", ".join(player_display_names)
+            fields.append((
+                "🎭 Co-Storyteller(s)",
+                ", ".join(strip_st_prefix(co.display_name) for co in co_sts),
+                False
+            ))
+        
+        if len(players) <= 25:
+            players_text = ", ".join(name for name, _ in players)
         else:
-            players_text = ", ".join(player_display_names[:25]) + f"\n*...and {len(player_display_names) - 25} more*"
+            players_text = ", ".join(name for name, _ in players[:25]) + f"\n*...and {len(players) - 25} more*"
         
-        embed.add_field(
-            name=f"{EMOJI_CANDLE} Gathered in the Square",
-            value=players_text,
-            inline=False
-        )
-        
-        # Add session code if available
-        if session_manager and botc_category:
-            session = await session_manager.get_session(guild_id, botc_category.id)
-            if session and session.session_code:
-                embed.add_field(
-                    name="🔗 Session Code",
-                    value=f"`{session.session_code}` - Use this code to link stats on grim.hystericca.dev",
-                    inline=False
-                )
+        fields.append((_F_GATHERED, players_text, False))
         
-        embed.set_footer(text=f"Grimkeeper v{VERSION} • May fate be kind...")
+        # Add session code if available (the linked session already carries it)
+        session = linked_session
+        if session and session.session_code:
+            fields.append((
+                "🔗 Session Code",
+                f"`{session.session_code}` - Use this code to link stats on grim.hystericca.dev",
+                False
+            ))
+        
+        embed = discord.Embed.from_dict({
+            "title": f"{EMOJI_TOWN_SQUARE} A New Tale Begins",
+            "description": "The grimoire opens as shadows gather in the town square...",
+            "color": discord.Color.dark_gold().value,
+            "timestamp": discord.utils.utcnow().isoformat(),
+            "author": {"name": f"Storyteller: {st_name}", "icon_url": str(main_st.display_avatar.url)},
+            "fields": _field_payload(fields),
+            "footer": {"text": f"Grimkeeper v{VERSION} • May fate be kind..."},
+        })
         
         # Return the embed so it can be sent to the channel where command was used
         # (Don't send to announcement channel - that would be duplicate)
@@ -285,6 +330,7 @@ async def start_game_handler(
         )
 
 
+@_bounded(ephemeral=True)
 async def end_game_handler(
     interaction: discord.Interaction,
     bot,
@@ -299,27 +345,6 @@ async def end_game_handler(
         db: Database instance
         winner: 'Good', 'Evil', or 'Cancel'
     """
-    good_win_messages = [
-        "The last whispers of the Demon's manipulation fade away as the sun rises once more. Truth claims its victory over lies and deceit.",
-        "Free from evil, dawn brings justice, and with it comes the end of the Demon's grasp over the village.",
-        "Through unwavering resolve, the townsfolk expose their enemies in the dark. The Demon is cast down, and the village reclaims its peace.",
-        "Good has prevailed! The evil threat is vanquished, and your town lives to see another sunrise.",
-        "As dawn breaks, the final whispers of evil are snuffed out. The townsfolk stand victorious. Bruised, battered, but unbroken.",
-        "Good wins! Turns out teamwork, blind panic, and arguing loudly really does defeat demons.",
-        "The final vote seals the fate of evil. With the demon gone, the village can at last breathe freely. Good triumphs!",
-        "Against all logic, accusations, and five days of utter nonsense, the good team somehow pulls it off. Evil is dead. Enjoy the bragging rights."
-    ]
-    evil_win_messages = [
-        "With the final flicker of hope being extinguished at last, evil tightens its grip. The town's final breath belongs to the Demon.",
-        "As the last ounce of good disappears, silence settles over the cobblestone. The Demon's victory is absolute, and the night belongs to evil.",
-        "The final stand of the good team proves fruitless. In the silence that follows the death of the townsfolk, evil's laughter fills the square.",
-        "Night falls forever. With the final shred of hope extinguished, evil claims the town.",
-        "The demon's plan unfolds flawlessly. As the last good soul falls, darkness tightens its grip. Evil triumphs.",
-        "Evil wins! Turns out lying through your teeth does pay off.",
-        "As dawn breaks, the town falls silent. The Demon's plot is complete, its minions triumphant. With the good dead or deceived beyond recovery, evil claims the final victory in the town square.",
-        "After days of arguing, tunneling, and trusting exactly the wrong people, the town hands victory to evil on a silver platter."
-    ]
-    
     try:
         guild = interaction.guild
         member = guild.get_member(interaction.user.id) if guild else None
@@ -405,19 +430,10 @@ async def end_game_handler(
             "winner": winner
         }
         
-        # Parse players
-        players_data = record['players']
-        if isinstance(players_data, str):
-            try:
-                players_list = json.loads(players_data)
-            except:
-                players_list = []
-        elif isinstance(players_data, list):
-            players_list = players_data
-        else:
-            players_list = []
-        
-        player_count = len(players_list)
+        # player_count is stored with the game; only very old rows need the array length
+        player_count = game['player_count']
+        if player_count is None:
+            player_count = len(record['players'] or [])
         
         # Calculate duration
         duration_seconds = int(end_time - game["start_time"])
@@ -438,43 +454,26 @@ async def end_game_handler(
         
         # Create embed
         st_name = strip_st_prefix(member.display_name)
+        thumbnail_url = None
         if winner_str == "Good":
-            embed = discord.Embed(
-                title=f"{EMOJI_GOOD_WIN} The Dawn Breaks",
-                description=f"*{random.choice(good_win_messages)}*",
-                color=discord.Color.blue(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.set_author(name=st_name, icon_url=member.display_avatar.url)
-            embed.set_thumbnail(url=ICON_GOOD)
-            embed.add_field(name=f"**{EMOJI_SWORD} Victor**", value="Good", inline=True)
+            title = f"{EMOJI_GOOD_WIN} The Dawn Breaks"
+            description = f"*{random.choice(GOOD_WIN_MESSAGES)}*"
+            color = discord.Color.blue()
+            thumbnail_url = ICON_GOOD
+            result_field = (_F_VICTOR, "Good", True)
         elif winner_str == "Evil":
-            embed = discord.Embed(
-                title=f"{EMOJI_EVIL_WIN} Eternal Night Falls",
-                description=f"*{random.choice(evil_win_messages)}*",
-                color=discord.Color.dark_red(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.set_author(name=st_name, icon_url=member.display_avatar.url)
-            embed.set_thumbnail(url=ICON_EVIL)
-            embed.add_field(name=f"**{EMOJI_SWORD} Victor**", value="Evil", inline=True)
+            title = f"{EMOJI_EVIL_WIN} Eternal Night Falls"
+            description = f"*{random.choice(EVIL_WIN_MESSAGES)}*"
+            color = discord.Color.dark_red()
+            thumbnail_url = ICON_EVIL
+            result_field = (_F_VICTOR, "Evil", True)
         else:
-            embed = discord.Embed(
-                title=f"{EMOJI_SCRIPT} The Grimoire Closes",
-                description=f"*The tale of {script_name} ends in shadow...*",
-                color=discord.Color.dark_gray(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.set_author(name=st_name, icon_url=member.display_avatar.url)
-            embed.add_field(name=f"**{EMOJI_SWORD} Result**", value=f"{winner_str}", inline=True)
-        
-        embed.add_field(name=f"**{EMOJI_SCRIPT} Script**", value=f"{script_name}", inline=True)
-        embed.add_field(name="\u200b", value="\u200b", inline=True)
-        embed.add_field(name=f"**{EMOJI_CLOCK} Duration**", value=f"{duration_str}", inline=True)
-        embed.add_field(name=f"**{EMOJI_PLAYERS} Players**", value=f"{player_count}", inline=True)
+            title = f"{EMOJI_SCRIPT} The Grimoire Closes"
+            description = f"*The tale of {script_name} ends in shadow...*"
+            color = discord.Color.dark_gray()
+            result_field = (_F_RESULT, f"{winner_str}", True)
         
         start_timestamp = int(game["start_time"])
-        embed.add_field(name=f"**{EMOJI_CLOCK} Began**", value=f"<t:{start_timestamp}:t>", inline=True)
         
         # Add session code if available
         session_manager = bot.session_manager
@@ -485,10 +484,31 @@ async def end_game_handler(
         footer_text = f"Grimkeeper v{VERSION} • The tale is told"
         if session and session.session_code:
             footer_text += f" • Session: {session.session_code}"
-        embed.set_footer(text=footer_text)
         
-        # Send to the channel where the command was used (not announcement channel)
-        await interaction.response.send_message(embed=embed)
+        payload = {
+            "title": title,
+            "description": description,
+            "color": color.value,
+            "timestamp": discord.utils.utcnow().isoformat(),
+            "author": {"name": st_name, "icon_url": str(member.display_avatar.url)},
+            "fields": _field_payload((
+                result_field,
+                (_F_SCRIPT, f"{script_name}", True),
+                ("\u200b", "\u200b", True),
+                (_F_DURATION, f"{duration_str}", True),
+                (_F_PLAYERS, f"{player_count}", True),
+                (_F_BEGAN, f"<t:{start_timestamp}:t>", True),
+            )),
+            "footer": {"text": footer_text},
+        }
+        if thumbnail_url:
+            payload["thumbnail"] = {"url": thumbnail_url}
+        embed = discord.Embed.from_dict(payload)
+        
+        # Post publicly to the channel where the command was used (not announcement
+        # channel); the deferred response itself is ephemeral
+        await interaction.channel.send(embed=embed)
+        await safe_send_interaction(interaction, "✅ Game ended.", ephemeral=True)
                         
     except DatabaseError as e:
         logger.error(f"Database error in end_game_handler: {e}")
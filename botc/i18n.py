@@ -5,29 +5,52 @@ Handles loading translation files and providing localized strings.
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 logger = logging.getLogger('botc_bot')
 
+LOCALES_DIR = Path(__file__).parent.parent / 'locales'
+
+
+def _flatten(tree: dict, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Yield (dot.path, value) pairs for every leaf of a nested translation dict."""
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield prefix + key, value
+
+
 class Translator:
     """Manages translations for multiple languages."""
     
     def __init__(self, default_language: str = 'en', db=None):
         self.default_language = default_language
         self.translations: Dict[str, dict] = {}
+        # Same translations keyed by full dot path ("errors.no_permission")
+        self.translations_flat: Dict[str, Dict[str, Any]] = {}
         self.guild_languages: Dict[int, str] = {}
+        # Last loaded mtime per language file, so reloads skip unchanged files
+        self._mtimes: Dict[str, float] = {}
         self.db = db
         self.load_all_translations()
     
     def load_all_translations(self):
-        """Load all translation files from locales/ directory."""
-        locales_dir = Path(__file__).parent.parent / 'locales'
+        """Load translation files from locales/ directory.
         
-        for json_file in locales_dir.glob('*.json'):
+        Files whose modification time hasn't changed since the last load are skipped.
+        """
+        for json_file in LOCALES_DIR.glob('*.json'):
             language_code = json_file.stem
             try:
+                mtime = json_file.stat().st_mtime
+                if self._mtimes.get(language_code) == mtime:
+                    continue
                 with open(json_file, 'r', encoding='utf-8') as f:
-                    self.translations[language_code] = json.load(f)
+                    data = json.load(f)
+                self.translations[language_code] = data
+                self.translations_flat[language_code] = dict(_flatten(data))
+                self._mtimes[language_code] = mtime
                 logger.info(f"Loaded translation: {language_code}")
             except Exception as e:
                 logger.error(f"Failed to load translation {language_code}: {e}")
@@ -62,17 +85,9 @@ class Translator:
             t.get(guild_id, "game_messages.good_wins", index=2)
         """
         lang = self.get_guild_language(guild_id)
-        trans = self.translations.get(lang, self.translations.get(self.default_language, {}))
-        
-        keys = key_path.split('.')
-        value = trans
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                value = None
-                break
+        trans = self.translations_flat.get(lang, self.translations_flat.get(self.default_language, {}))
         
+        value = trans.get(key_path)
         if value is None:
             value = self._get_fallback(key_path)
         
@@ -90,15 +105,7 @@ class Translator:
     
     def _get_fallback(self, key_path: str) -> Optional[str]:
         """Get English fallback if translation is missing."""
-        trans = self.translations.get(self.default_language, {})
-        keys = key_path.split('.')
-        value = trans
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return None
-        return value
+        return self.translations_flat.get(self.default_language, {}).get(key_path)
     
     def get_available_languages(self) -> Dict[str, str]:
         """Get list of available languages.
@@ -113,8 +120,13 @@ class Translator:
             'ru': '🇷🇺 Русский',
         }
 
-# Global translator instance
+# Global translator instance, loaded at import so the first lookup doesn't
+# parse the locale files on the event loop
 _translator: Optional[Translator] = None
+try:
+    _translator = Translator()
+except Exception as e:
+    logger.error(f"Failed to preload translations: {e}")
 
 def get_translator() -> Translator:
     """Get the global translator instance."""
@@ -1,7 +1,7 @@
 """Poll creation and poll-end handling extracted from main.py.
 
-create_poll_internal now requires a get_active_players callable to avoid
-import cycles with main.py.
+create_poll_internal now requires a get_mention_text callable (returning the
+active players' mentions already joined) to avoid import cycles with main.py.
 """
 from __future__ import annotations
 
@@ -9,53 +9,83 @@ import time
 import logging
 import asyncio
 import discord
-from typing import Callable, List, Tuple, Dict, Awaitable
+from typing import Callable, List, Tuple, Dict, Set, Awaitable
 
 from botc.constants import POLL_EMOJI_MAP, POLL_SCRIPT_MAP, POLL_VALID_OPTIONS, MAX_POLL_DURATION, EMOJI_SCROLL
 from botc.utils import parse_duration, humanize_seconds, format_end_time
 
 logger = logging.getLogger('botc_bot')
 
+# Poll message ID -> event that wakes _end_poll early when the poll is cancelled
+_poll_cancel_events: Dict[int, asyncio.Event] = {}
+
+# Poll message ID -> {option emoji: IDs of users currently reacting with it}, kept
+# up to date from raw reaction events so tallying never needs the message cache
+_poll_votes: Dict[int, Dict[str, Set[int]]] = {}
+
+
+def record_poll_reaction(message_id: int, emoji: str, user_id: int, added: bool) -> None:
+    """Apply a raw reaction add/remove to a running poll's tally."""
+    votes = _poll_votes.get(message_id)
+    if votes is None:
+        return
+    voters = votes.get(emoji)
+    if voters is None:
+        return
+    if added:
+        voters.add(user_id)
+    else:
+        voters.discard(user_id)
+
+
+def cancel_poll(message_id: int) -> bool:
+    """Stop a running poll without announcing results.
+
+    Returns True if a poll was waiting on this message.
+    """
+    event = _poll_cancel_events.get(message_id)
+    if event is None:
+        return False
+    event.set()
+    return True
+
 
 async def _end_poll(delay_seconds: int, poll_message: discord.Message, options: List[str], emoji_map: Dict[str, str], script_map: Dict[str, str], creator_id: int) -> None:
-    """Wait for poll to finish, then announce results."""
+    """Wait for poll to finish (or be cancelled), then announce results."""
+    cancelled = _poll_cancel_events.setdefault(poll_message.id, asyncio.Event())
     try:
-        await asyncio.sleep(delay_seconds)
+        try:
+            await asyncio.wait_for(cancelled.wait(), timeout=delay_seconds)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            logger.info(f"Poll {poll_message.id} was cancelled before it ended")
+            return
 
         channel = poll_message.channel
         guild = channel.guild
-        try:
-            poll_message = await channel.fetch_message(poll_message.id)
-        except Exception as e:
-            logger.info(f"Poll message was deleted before results could be announced: {e}")
-            return
 
         creator = guild.get_member(creator_id)
         creator_mention = creator.mention if creator else ""
 
-        vote_counts = {}
-        for opt in options:
-            emoji = emoji_map[opt]
-            for reaction in poll_message.reactions:
-                if str(reaction.emoji) == emoji:
-                    vote_counts[opt] = reaction.count - 1
-                    break
-            else:
-                vote_counts[opt] = 0
-        if not vote_counts or max(vote_counts.values()) == 0:
+        votes = _poll_votes.get(poll_message.id, {})
+        # (emoji, script name, count) per option, resolved once for every branch below
+        rows = [
+            (emoji_map[opt], script_map[opt], len(votes.get(emoji_map[opt], ())))
+            for opt in options
+        ]
+        max_votes = max((count for _, _, count in rows), default=0)
+        if max_votes == 0:
             result_embed = discord.Embed(
                 title="Poll Ended",
                 description="No votes were cast!",
                 color=discord.Color.light_gray()
             )
         else:
-            max_votes = max(vote_counts.values())
-            winners = [opt for opt, count in vote_counts.items() if count == max_votes]
+            winners = [row for row in rows if row[2] == max_votes]
 
             if len(winners) == 1:
-                winner_opt = winners[0]
-                winner_name = script_map[winner_opt]
-                winner_emoji = emoji_map[winner_opt]
+                winner_emoji, winner_name, _ = winners[0]
 
                 result_embed = discord.Embed(
                     title="Poll Results",
@@ -63,17 +93,17 @@ async def _end_poll(delay_seconds: int, poll_message: discord.Message, options:
                     color=discord.Color.gold()
                 )
             else:
-                winner_names = [f"{emoji_map[opt]} {script_map[opt]}" for opt in winners]
+                winner_names = [f"{emoji} {name}" for emoji, name, _ in winners]
                 result_embed = discord.Embed(
                     title="Poll Results",
                     description=f"## Tie between:\n\n{' and '.join(winner_names)}\n\n**{max_votes}** vote{'s' if max_votes != 1 else ''} each",
                     color=discord.Color.gold()
                 )
 
-            breakdown = ""
-            for opt in options:
-                count = vote_counts.get(opt, 0)
-                breakdown += f"{emoji_map[opt]} {script_map[opt]}: **{count}** vote{'s' if count != 1 else ''}\n"
+            breakdown = "\n".join(
+                f"{emoji} {name}: **{count}** vote{'s' if count != 1 else ''}"
+                for emoji, name, count in rows
+            )
             result_embed.add_field(name="Full Results", value=breakdown, inline=False)
 
         result_embed.set_footer(text="Poll ended")
@@ -88,6 +118,9 @@ async def _end_poll(delay_seconds: int, poll_message: discord.Message, options:
         return
     except Exception:
         logger.exception("Poll end error")
+    finally:
+        _poll_cancel_events.pop(poll_message.id, None)
+        _poll_votes.pop(poll_message.id, None)
 
 
 async def create_poll_internal(
@@ -96,11 +129,11 @@ async def create_poll_internal(
     options: str,
     duration_str: str,
     creator: discord.Member,
-    get_active_players: Callable[[discord.Guild], Awaitable[list]]
+    get_mention_text: Callable[[discord.Guild], Awaitable[str]]
 ) -> Tuple[discord.Message, list, dict, dict, int]:
     """Shared poll creation logic."""
     options = options.lower().strip()
-    if not all(char in POLL_VALID_OPTIONS for char in options):
+    if not POLL_VALID_OPTIONS.issuperset(options):
         raise ValueError("❌ Invalid poll options. Please use only: **1** (Trouble Brewing), **2** (Sects & Violets), **3** (Bad Moon Rising), **c** (Custom), **h** (Homebrew)")
 
     if not options:
@@ -113,12 +146,8 @@ async def create_poll_internal(
     if poll_duration > MAX_POLL_DURATION:
         poll_duration = MAX_POLL_DURATION
 
-    seen = set()
-    unique_options = []
-    for char in options:
-        if char not in seen:
-            seen.add(char)
-            unique_options.append(char)
+    # dict.fromkeys keeps first-seen order while dropping repeats
+    unique_options = list(dict.fromkeys(options))
 
     end_time = time.time() + poll_duration
     human_duration = humanize_seconds(poll_duration)
@@ -132,23 +161,20 @@ async def create_poll_internal(
 
     embed.set_author(name=creator.display_name, icon_url=creator.display_avatar.url)
 
-    field_text = ""
-    for opt in unique_options:
-        field_text += f"{POLL_EMOJI_MAP[opt]} {POLL_SCRIPT_MAP[opt]}\n"
+    field_text = "\n".join(f"{POLL_EMOJI_MAP[opt]} {POLL_SCRIPT_MAP[opt]}" for opt in unique_options)
 
     embed.add_field(name="Options", value=field_text, inline=False)
     embed.set_footer(text="React to cast your vote")
 
-    # Use provided active player getter (now async)
+    # Mention text comes pre-joined from the active players cache
     try:
-        active_player_mentions = await get_active_players(guild)
+        mention_text = await get_mention_text(guild)
     except Exception as e:
         logger.exception(f"Failed to get active players for poll: {e}")
-        active_player_mentions = []
+        mention_text = ""
 
     try:
-        if active_player_mentions:
-            mention_text = " ".join(active_player_mentions)
+        if mention_text:
             poll_msg = await channel.send(content=mention_text, embed=embed)
         else:
             poll_msg = await channel.send(embed=embed)
@@ -156,11 +182,30 @@ async def create_poll_internal(
         logger.exception(f"Failed to send poll message: {e}")
         raise
 
+    # Start tracking votes before the bot's own reactions go on
+    _poll_votes[poll_msg.id] = {POLL_EMOJI_MAP[opt]: set() for opt in unique_options}
+
+    # Reactions stay sequential: Discord shows them in the order they were added, and the
+    # reaction route is rate limited per channel, so concurrent adds would only shuffle them.
+    # A failed reaction no longer aborts the (already posted) poll.
     try:
+        failed = 0
         for opt in unique_options:
-            await poll_msg.add_reaction(POLL_EMOJI_MAP[opt])
-    except Exception as e:
-        logger.exception(f"Failed to add reaction to poll: {e}")
+            try:
+                await poll_msg.add_reaction(POLL_EMOJI_MAP[opt])
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Failed to add reaction {POLL_EMOJI_MAP[opt]} to poll: {e}")
+        if failed == len(unique_options):
+            raise RuntimeError("Could not add any poll reactions")
+    except Exception:
+        # No _end_poll will ever be scheduled for this message: stop tracking it and
+        # take the unvotable poll down
+        _poll_votes.pop(poll_msg.id, None)
+        try:
+            await poll_msg.delete()
+        except Exception as e:
+            logger.warning(f"Failed to delete poll message after reaction failure: {e}")
         raise
 
     return (poll_msg, unique_options, POLL_EMOJI_MAP, POLL_SCRIPT_MAP, poll_duration)
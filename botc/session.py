@@ -13,19 +13,25 @@ Key concepts:
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from typing import Optional, TYPE_CHECKING
 from dataclasses import dataclass, field
 
-import discord
-
 if TYPE_CHECKING:
+    import discord
+
     from botc.database import Database
 
 logger = logging.getLogger('botc_bot')
 
+# Upper bound on sessions held in SessionManager's cache (least recently used is evicted first)
+SESSION_CACHE_MAX_SIZE = 1024
 
-@dataclass
+
+@dataclass(slots=True)
 class Session:
     """Represents an active game session scoped to a specific category.
     
@@ -81,7 +87,23 @@ class SessionManager:
     
     def __init__(self, db: Database):
         self.db = db
-        self._cache: dict[tuple[int, int], Session] = {}
+        self._cache: OrderedDict[tuple[int, int], Session] = OrderedDict()
+        # In-flight loads, so concurrent misses for one session share one query
+        self._inflight: dict[tuple[int, int], asyncio.Future] = {}
+    
+    def _cache_get(self, session_key: tuple[int, int]) -> Optional[Session]:
+        """Return a cached session and mark it as recently used."""
+        session = self._cache.get(session_key)
+        if session is not None:
+            self._cache.move_to_end(session_key)
+        return session
+    
+    def _cache_put(self, session_key: tuple[int, int], session: Session) -> None:
+        """Cache a session, evicting the least recently used one past the size cap."""
+        self._cache[session_key] = session
+        self._cache.move_to_end(session_key)
+        if len(self._cache) > SESSION_CACHE_MAX_SIZE:
+            self._cache.popitem(last=False)
     
     async def _generate_session_code(self, guild_id: int) -> str:
         """Generate a globally unique session code.
@@ -94,33 +116,37 @@ class SessionManager:
         Returns:
             Session code like "s1", "s2", etc.
         """
-        # Get ALL existing sessions across ALL guilds to find next number
-        result = await self.db.pool.fetchval(
-            "SELECT session_code FROM sessions WHERE session_code IS NOT NULL ORDER BY session_code"
-        )
+        # Codes are global, so the next one is simply the highest number in use + 1
+        highest = await self.db.get_max_session_code_number()
+        return f"s{(highest or 0) + 1}"
+    
+    async def migrate_legacy_codes(self) -> int:
+        """Assign session codes to legacy sessions that don't have one yet.
         
-        # Get all session codes
-        all_codes = await self.db.pool.fetch(
-            "SELECT session_code FROM sessions WHERE session_code ~ '^s[0-9]+$'"
-        )
+        Runs once at startup as a single UPDATE, instead of writing on the first
+        read of each legacy session.
         
-        # Extract numbers from existing codes (e.g., "s1" -> 1, "s2" -> 2)
-        existing_numbers = []
-        for row in all_codes:
-            code = row['session_code']
-            if code and code.startswith('s'):
-                try:
-                    num = int(code[1:])
-                    existing_numbers.append(num)
-                except ValueError:
-                    pass
-        
-        # Find next available number
-        next_num = 1
-        if existing_numbers:
-            next_num = max(existing_numbers) + 1
-        
-        return f"s{next_num}"
+        Returns:
+            Number of sessions that were given a code
+        """
+        migrated = await self.db.assign_missing_session_codes()
+        if migrated:
+            self.invalidate_cache()
+            logger.info(f"Assigned session codes to {migrated} legacy sessions")
+        return migrated
+    
+    async def _resolve(self, channel: discord.abc.GuildChannel, guild: discord.Guild) -> Optional[Session]:
+        """Resolve the session for whichever category a channel sits in.
+        
+        Every channel-, message-, interaction- and voice-based lookup funnels
+        through here so they all share the LRU cache and in-flight load dedup
+        of get_session.
+        """
+        # category_id is stored on the channel payload; no CategoryChannel lookup needed
+        category_id = getattr(channel, "category_id", None)
+        if category_id is None:
+            return None
+        return await self.get_session(guild.id, category_id)
     
     async def get_session_from_channel(
         self, 
@@ -139,24 +165,7 @@ class SessionManager:
         Returns:
             Session if channel is in a BOTC category, None otherwise
         """
-        if not channel.category:
-            return None
-        
-        category_id = channel.category.id
-        session_key = (guild.id, category_id)
-        
-        # Check cache first
-        if session_key in self._cache:
-            return self._cache[session_key]
-        
-        # Load from database
-        session = await self.db.get_session(guild.id, category_id)
-        
-        if session:
-            self._cache[session_key] = session
-            return session
-        
-        return None
+        return await self._resolve(channel, guild)
     
     async def get_or_create_session_from_channel(
         self,
@@ -176,23 +185,14 @@ class SessionManager:
         Returns:
             Session for this category, creating if needed. None if channel has no category.
         """
-        if not channel.category:
-            return None
-        
-        category_id = channel.category.id
-        session_key = (guild.id, category_id)
-        
-        # Check cache first
-        if session_key in self._cache:
-            return self._cache[session_key]
-        
-        # Load from database
-        session = await self.db.get_session(guild.id, category_id)
-        
-        if session:
-            self._cache[session_key] = session
+        session = await self._resolve(channel, guild)
+        if session is not None:
             return session
         
+        category_id = getattr(channel, "category_id", None)
+        if category_id is None:
+            return None
+        
         # Create new session for this category
         logger.info(f"Creating new session for guild {guild.id}, category {category_id} ({channel.category.name if channel.category else 'unknown'})")
         session = await self.create_session(guild.id, category_id)
@@ -207,7 +207,7 @@ class SessionManager:
         Returns:
             Session if message is in a BOTC category, None otherwise
         """
-        return await self.get_session_from_channel(message.channel, message.guild)
+        return await self._resolve(message.channel, message.guild)
     
     async def get_session_from_interaction(self, interaction: discord.Interaction) -> Optional[Session]:
         """Resolve session from a slash command interaction.
@@ -218,7 +218,7 @@ class SessionManager:
         Returns:
             Session if interaction is in a BOTC category, None otherwise
         """
-        return await self.get_session_from_channel(interaction.channel, interaction.guild)
+        return await self._resolve(interaction.channel, interaction.guild)
     
     async def get_session_from_voice_channel(
         self,
@@ -234,7 +234,7 @@ class SessionManager:
         Returns:
             Session if voice channel is in a BOTC category, None otherwise
         """
-        return await self.get_session_from_channel(voice_channel, guild)
+        return await self._resolve(voice_channel, guild)
     
     async def get_session(self, guild_id: int, category_id: int) -> Optional[Session]:
         """Get a session by guild and category ID directly.
@@ -249,24 +249,35 @@ class SessionManager:
         session_key = (guild_id, category_id)
         
         # Check cache first
-        if session_key in self._cache:
-            return self._cache[session_key]
+        cached = self._cache_get(session_key)
+        if cached is not None:
+            return cached
+        
+        # Join a load that's already running for this session
+        future = self._inflight.get(session_key)
+        if future is None:
+            future = asyncio.ensure_future(self._load_session(guild_id, category_id))
+            self._inflight[session_key] = future
+            future.add_done_callback(lambda f: self._release_load(session_key, f))
+        return await asyncio.shield(future)
+    
+    def _release_load(self, session_key: tuple[int, int], future: asyncio.Future) -> None:
+        """Forget a finished in-flight load (unless it was already replaced)."""
+        if self._inflight.get(session_key) is future:
+            del self._inflight[session_key]
+    
+    async def _load_session(self, guild_id: int, category_id: int) -> Optional[Session]:
+        """Load a session from the database and cache it unless invalidated mid-load."""
+        session_key = (guild_id, category_id)
+        pending = self._inflight.get(session_key)
         
-        # Load from database
+        # Legacy sessions without a code are backfilled once at startup
+        # (migrate_legacy_codes), so a load is a plain read
         session = await self.db.get_session(guild_id, category_id)
         
-        if session:
-            # Auto-generate code for legacy sessions that don't have one (migration support)
-            if not session.session_code:
-                session.session_code = await self._generate_session_code(guild_id)
-                await self.db.update_session(session)
-                logger.info(f"Auto-generated session code '{session.session_code}' for legacy session: guild={guild_id}, category={category_id}")
-            
-            self._cache[session_key] = session
-            return session
-        
-        # No session found
-        return None
+        if session and pending is not None and self._inflight.get(session_key) is pending:
+            self._cache_put(session_key, session)
+        return session
     
     async def create_session(
         self, 
@@ -298,7 +309,6 @@ class SessionManager:
         Returns:
             Newly created Session
         """
-        from datetime import datetime
         now = datetime.utcnow()
         
         # Generate session code if not provided
@@ -320,8 +330,10 @@ class SessionManager:
             session_code=session_code
         )
         
-        await self.db.create_session(session)
-        self._cache[session.session_id] = session
+        # Upsert: if the category already had a session, this is the merged row
+        session = await self.db.create_session(session)
+        self._cache_put(session.session_id, session)
+        self._inflight.pop(session.session_id, None)
         
         logger.info(f"Created new session: {session}")
         return session
@@ -332,11 +344,45 @@ class SessionManager:
         Args:
             session: Session with updated fields
         """
-        from datetime import datetime
         session.last_active = datetime.utcnow()
         
         await self.db.update_session(session)
-        self._cache[session.session_id] = session
+        self._cache_put(session.session_id, session)
+        self._inflight.pop(session.session_id, None)
+    
+    async def link_active_game(
+        self,
+        guild_id: int,
+        category_id: int,
+        game_id: Optional[int],
+        storyteller_user_id: Optional[int]
+    ) -> Optional[Session]:
+        """Link a newly started game and its storyteller to a session.
+        
+        Replaces the invalidate/get/update sequence with a single UPDATE ... RETURNING,
+        and caches the row the database hands back.
+        
+        Args:
+            guild_id: Discord guild ID
+            category_id: Discord category ID
+            game_id: ID of the game that was just started
+            storyteller_user_id: User ID of the main storyteller
+            
+        Returns:
+            Updated Session, or None if the category has no session
+        """
+        session_key = (guild_id, category_id)
+        
+        session = await self.db.link_session_game(
+            guild_id, category_id, game_id, storyteller_user_id, datetime.utcnow()
+        )
+        self._inflight.pop(session_key, None)
+        if session:
+            self._cache_put(session_key, session)
+        else:
+            self._cache.pop(session_key, None)
+        
+        return session
     
     async def delete_session(self, guild_id: int, category_id: int) -> bool:
         """Delete a session.
@@ -350,6 +396,7 @@ class SessionManager:
         """
         result = await self.db.delete_session(guild_id, category_id)
         self._cache.pop((guild_id, category_id), None)
+        self._inflight.pop((guild_id, category_id), None)
         
         if result:
             logger.info(f"Deleted session: guild={guild_id}, category={category_id}")
@@ -376,15 +423,13 @@ class SessionManager:
         Returns:
             Number of sessions deleted
         """
-        from datetime import datetime, timedelta
         cutoff_dt = datetime.utcnow() - timedelta(days=max_age_days)
-        deleted = await self.db.delete_inactive_sessions(cutoff_dt)
+        removed = await self.db.delete_inactive_sessions(cutoff_dt)
+        deleted = len(removed)
 
-        # Clear from cache
-        for session_key in list(self._cache.keys()):
-            session = self._cache[session_key]
-            if session.last_active and session.last_active < cutoff_dt:
-                self._cache.pop(session_key, None)
+        # Clear exactly the deleted sessions from cache
+        for row in removed:
+            self._cache.pop((row['guild_id'], row['category_id']), None)
         
         if deleted > 0:
             logger.info(f"Cleaned up {deleted} inactive sessions (older than {max_age_days} days)")
@@ -400,12 +445,16 @@ class SessionManager:
         """
         if guild_id is not None and category_id is not None:
             self._cache.pop((guild_id, category_id), None)
+            self._inflight.pop((guild_id, category_id), None)
         elif guild_id is not None:
             keys_to_remove = [k for k in self._cache.keys() if k[0] == guild_id]
             for key in keys_to_remove:
                 self._cache.pop(key, None)
+            for key in [k for k in self._inflight if k[0] == guild_id]:
+                self._inflight.pop(key, None)
         else:
             self._cache.clear()
+            self._inflight.clear()
 
 
 async def get_session_category(
@@ -8,12 +8,13 @@ from __future__ import annotations
 
 import asyncio
 import time
+from dataclasses import dataclass
 import aiohttp
 from typing import Callable, TYPE_CHECKING
 import logging
 import discord
 
-from botc.constants import DELETE_DELAY_DRAMATIC, DELETE_DELAY_ERROR
+from botc.constants import DELETE_DELAY_ERROR
 
 if TYPE_CHECKING:
     from botc.database import Database
@@ -21,6 +22,28 @@ if TYPE_CHECKING:
 logger = logging.getLogger('botc_bot')
 
 GRIMLIVE_API_URL = "https://api.hystericca.dev"
+GRIMLIVE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+# Longest single wait before a timer re-checks its monotonic deadline
+TIMER_RECHECK_INTERVAL = 30
+
+
+@dataclass(slots=True)
+class TimerRecord:
+    """A guild's scheduled (or paused) call-townspeople timer.
+    
+    Setting event wakes the task without firing (stop, pause or a newer timer).
+    end_time is wall-clock (persisted and shown to users); deadline is the
+    time.monotonic() value the task actually waits for.
+    """
+    task: asyncio.Task
+    event: asyncio.Event
+    end_time: float
+    deadline: float
+    creator: int | None
+    announce_msg: discord.Message | None = None
+    category_id: int | None = None
+    is_paused: bool = False
+    paused_remaining: int = 0
 
 
 class TimerManager:
@@ -28,20 +51,38 @@ class TimerManager:
         self.bot = bot
         self.db = db
         self.call_townspeople = call_townspeople
-        # guild_id (int) -> {task, end_time, creator, announce_msg, category_id, is_paused, paused_remaining}
-        self.scheduled_timers: dict[int, dict] = {}
+        self.scheduled_timers: dict[int, TimerRecord] = {}
+        # Shared keep-alive session for grimlive sync; created on first use
+        self._http: aiohttp.ClientSession | None = None
+        # Strong refs to in-flight grimlive syncs so they aren't collected mid-request
+        self._bg_tasks: set[asyncio.Task] = set()
+    
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """Return the shared grimlive HTTP session, opening it if needed."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+                timeout=GRIMLIVE_TIMEOUT
+            )
+        return self._http
+    
+    async def close(self) -> None:
+        """Close the shared grimlive HTTP session (called on bot shutdown)."""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
     
     async def _call_grimlive_api(self, endpoint: str, data: dict) -> bool:
         """Call grimlive API to sync timer state."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{GRIMLIVE_API_URL}/{endpoint}", json=data, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        logger.info(f"Successfully synced {endpoint} to grimlive API")
-                        return True
-                    else:
-                        logger.warning(f"Grimlive API {endpoint} returned status {response.status}")
-                        return False
+            session = await self._get_http()
+            async with session.post(f"{GRIMLIVE_API_URL}/{endpoint}", json=data) as response:
+                if response.status == 200:
+                    logger.info(f"Successfully synced {endpoint} to grimlive API")
+                    return True
+                else:
+                    logger.warning(f"Grimlive API {endpoint} returned status {response.status}")
+                    return False
         except asyncio.TimeoutError:
             logger.warning(f"Timeout calling grimlive API {endpoint}")
             return False
@@ -50,29 +91,44 @@ class TimerManager:
             return False
     
     async def _get_session_code(self, guild_id: int, category_id: int | None) -> str | None:
-        """Get session code for guild and category from database."""
+        """Get session code for guild and category.
+        
+        Served from the session manager's cache (kept in step with session
+        edits and deletes) so repeated timer transitions skip the database.
+        """
         try:
             if not category_id:
                 return None
-            result = await self.db.pool.fetchrow(
+            session_manager = getattr(self.bot, "session_manager", None)
+            if session_manager:
+                session = await session_manager.get_session(guild_id, category_id)
+                return session.session_code if session else None
+            return await self.db.pool.fetchval(
                 'SELECT session_code FROM sessions WHERE guild_id = $1 AND category_id = $2',
                 guild_id, category_id
             )
-            return result['session_code'] if result else None
         except Exception as e:
             logger.error(f"Error getting session code: {e}")
             return None
 
+    def _sync(self, endpoint: str, guild_id: int, category_id: int | None, **payload) -> None:
+        """Push a timer state change to the grimlive API in the background."""
+        task = asyncio.create_task(self._push_timer_state(endpoint, guild_id, category_id, payload))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+
+    async def _push_timer_state(self, endpoint: str, guild_id: int, category_id: int | None, payload: dict) -> None:
+        session_code = await self._get_session_code(guild_id, category_id)
+        if session_code:
+            await self._call_grimlive_api(endpoint, {'sessionCode': session_code, **payload})
+
     async def save_timers(self) -> None:
         """Save all active timers to database"""
         try:
-            for guild_id, info in self.scheduled_timers.items():
-                await self.db.save_timer(
-                    guild_id=guild_id,
-                    end_time=int(info["end_time"]),
-                    creator_id=info["creator"],
-                    category_id=info.get("category_id")
-                )
+            await self.db.save_timers_bulk([
+                (guild_id, int(info.end_time), info.creator, info.category_id)
+                for guild_id, info in self.scheduled_timers.items()
+            ])
         except Exception:
             logger.exception("Error saving timers to database")
 
@@ -81,54 +137,67 @@ class TimerManager:
         try:
             timers = await self.db.get_all_timers()
             now = time.time()
+            expired = []
+            # Snapshot guilds once rather than resolving each timer's guild separately
+            guild_map = {g.id: g for g in self.bot.guilds}
             
             for timer in timers:
-                guild_id = timer["guild_id"]
+                remaining = timer["end_time"] - now
+                if remaining <= 0:
+                    # Timer expired while bot was offline, remove it
+                    expired.append(timer["guild_id"])
+                    continue
+                
+                guild = guild_map.get(timer["guild_id"])
+                if not guild:
+                    continue
+                
+                guild_id = guild.id
                 end_time = timer["end_time"]
-                remaining = end_time - now
+                deadline = time.monotonic() + remaining
+                category_id = timer["category_id"]
                 
-                if remaining > 0:
-                    guild = self.bot.get_guild(guild_id)
-                    if guild:
-                        # Get session-scoped announce channel
-                        category_id = timer.get("category_id")
-                        announce_channel = None
-                        
-                        # Try to get session announce channel first
-                        session_manager = getattr(self.bot, "session_manager", None)
-                        if session_manager and category_id:
-                            session = await session_manager.get_session(guild_id, category_id)
-                            if session and session.announce_channel_id:
-                                announce_channel = guild.get_channel(session.announce_channel_id)
-                        
-                        # Fallback to guild system channel
-                        if not announce_channel:
-                            announce_channel = guild.system_channel
-                        
-                        if announce_channel:
-                            task = asyncio.create_task(self._timer_and_call(remaining, guild, announce_channel, category_id))
-                            self.scheduled_timers[guild_id] = {
-                                "task": task,
-                                "end_time": end_time,
-                                "creator": timer.get("creator_id"),
-                                "announce_msg": None,
-                                "category_id": category_id
-                            }
-                            logger.info(f"Restored timer for guild {guild.name} with {int(remaining)}s remaining")
-                else:
-                    # Timer expired while bot was offline, remove it
-                    await self.db.delete_timer(guild_id)
+                # Session announce channel comes back joined onto the timer row
+                announce_channel = None
+                if timer["announce_channel_id"]:
+                    announce_channel = guild.get_channel(timer["announce_channel_id"])
+                
+                # Fallback to guild system channel
+                if not announce_channel:
+                    announce_channel = guild.system_channel
+                
+                if announce_channel:
+                    event = asyncio.Event()
+                    task = asyncio.create_task(self._timer_and_call(deadline, guild, announce_channel, category_id, event))
+                    self.scheduled_timers[guild_id] = TimerRecord(
+                        task=task,
+                        event=event,
+                        end_time=end_time,
+                        deadline=deadline,
+                        creator=timer["creator_id"],
+                        category_id=category_id
+                    )
+                    logger.info(f"Restored timer for guild {guild.name} with {int(remaining)}s remaining")
+            
+            await self.db.delete_timers_bulk(expired)
         except Exception:
             logger.exception("Error loading timers from database")
 
-    async def _timer_and_call(self, delay_seconds: int, guild: discord.Guild, announce_channel: discord.TextChannel, category_id: int | None = None) -> None:
+    async def _timer_and_call(self, deadline: float, guild: discord.Guild, announce_channel: discord.TextChannel, category_id: int | None, event: asyncio.Event) -> None:
         try:
-            await asyncio.sleep(delay_seconds)
-
-            # Immediately announce timer completion
-            await announce_channel.send("# ⏰ TIME'S UP!")
+            # Wait in bounded slices against the monotonic deadline so long timers
+            # self-correct for loop stalls and ignore wall-clock jumps
+            while not event.is_set() and (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, TIMER_RECHECK_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+            if event.is_set():
+                # Stopped, paused or replaced; whoever set the event owns the scheduled entry
+                return
 
-            # Then try to call townspeople and announce results
+            # Call townspeople, then announce completion and the result in one message
+            banner = "# ⏰ TIME'S UP!"
             try:
                 moved_count, dest_channel = await self.call_townspeople(guild, category_id)
 
@@ -143,15 +212,12 @@ class TimerManager:
                 )
                 embed.set_footer(text="Called by timer")
 
-                msg = await announce_channel.send(embed=embed)
-                await msg.delete(delay=DELETE_DELAY_DRAMATIC)
+                await announce_channel.send(content=banner, embed=embed)
             except ValueError as e:
-                msg = await announce_channel.send(f"❌ {e}")
-                await msg.delete(delay=DELETE_DELAY_ERROR)
+                await announce_channel.send(f"{banner}\n❌ {e}")
             except Exception as e:
                 logger.error(f"Timer call error: {e}")
-                msg = await announce_channel.send("❌ An error occurred while calling townspeople.")
-                await msg.delete(delay=DELETE_DELAY_ERROR)
+                await announce_channel.send(f"{banner}\n❌ An error occurred while calling townspeople.")
 
         except asyncio.CancelledError:
             return
@@ -165,14 +231,18 @@ class TimerManager:
         finally:
             try:
                 gid = guild.id
-                info = self.scheduled_timers.pop(gid, None)
-                if info and info.get("announce_msg"):
-                    try:
-                        await info["announce_msg"].delete()
-                    except Exception:
-                        logger.exception("Failed to delete announce_msg during timer cleanup")
-                # Remove timer from database
-                await self.db.delete_timer(gid)
+                info = self.scheduled_timers.get(gid)
+                # A newer timer or a pause owns the guild's entry now; leave it and its row alone
+                superseded = info is not None and (info.event is not event or info.is_paused)
+                if not superseded:
+                    self.scheduled_timers.pop(gid, None)
+                    if info and info.announce_msg:
+                        try:
+                            await info.announce_msg.delete()
+                        except Exception:
+                            logger.exception("Failed to delete announce_msg during timer cleanup")
+                    # Remove timer from database
+                    await self.db.delete_timer(gid)
             except Exception:
                 logger.exception("Error during timer cleanup in finally block")
 
@@ -180,49 +250,35 @@ class TimerManager:
         # If a timer is already scheduled for this guild, cancel it first to
         # avoid multiple overlapping timers for the same guild.
         try:
-            prev = self.scheduled_timers.get(guild.id)
-            if prev and prev.get("task"):
-                try:
-                    prev["task"].cancel()
-                except Exception:
-                    logger.exception("Failed to cancel previous timer task in start_timer")
-                # remove previous entry; it will be cleaned up in the task's finally block
-                self.scheduled_timers.pop(guild.id, None)
+            prev = self.scheduled_timers.pop(guild.id, None)
+            if prev:
+                # wake the previous task; it returns without firing once it sees its event set
+                prev.event.set()
         except Exception:
             logger.exception("Error while cleaning up previous timer in start_timer")
 
         end_time = time.time() + seconds
-        # Use the event loop's create_task so tests (which may not have a
-        # running loop) can still create Task objects without raising a
-        # 'no running event loop' RuntimeError.
-        loop = asyncio.get_event_loop()
-        task = loop.create_task(self._timer_and_call(seconds, guild, announce_channel, category_id))
+        deadline = time.monotonic() + seconds
+        # Callers are always inside the bot's running loop (the grimlive sync
+        # below needs it too), so schedule on it directly
+        event = asyncio.Event()
+        task = asyncio.create_task(self._timer_and_call(deadline, guild, announce_channel, category_id, event))
         # store the scheduled timer info
-        self.scheduled_timers[guild.id] = {
-            "task": task, 
-            "end_time": end_time, 
-            "creator": creator, 
-            "announce_msg": announce_msg, 
-            "category_id": category_id,
-            "is_paused": False,
-            "paused_remaining": 0
-        }
+        self.scheduled_timers[guild.id] = TimerRecord(
+            task=task,
+            event=event,
+            end_time=end_time,
+            deadline=deadline,
+            creator=creator,
+            announce_msg=announce_msg,
+            category_id=category_id
+        )
         
         # Sync to grimlive API
-        asyncio.create_task(self._sync_timer_start(guild.id, seconds, category_id, creator))
+        self._sync('api/timer/start', guild.id, category_id, duration=seconds, discordUserId=creator)
         
         return task
     
-    async def _sync_timer_start(self, guild_id: int, duration: int, category_id: int | None, creator: int):
-        """Sync timer start to grimlive API."""
-        session_code = await self._get_session_code(guild_id, category_id)
-        if session_code:
-            await self._call_grimlive_api('api/timer/start', {
-                'sessionCode': session_code,
-                'duration': duration,
-                'discordUserId': creator
-            })
-
     def pause_timer(self, guild_id: int) -> tuple[bool, str]:
         """Pause an active timer for a guild.
         
@@ -233,39 +289,26 @@ class TimerManager:
         if not info:
             return (False, "No active timer to pause.")
         
-        if info.get("is_paused"):
+        if info.is_paused:
             return (False, "Timer is already paused.")
         
         # Calculate remaining time
-        remaining = int(info["end_time"] - time.time())
+        remaining = int(info.deadline - time.monotonic())
         if remaining <= 0:
             return (False, "Timer has already expired.")
         
-        # Cancel the current task
-        try:
-            info["task"].cancel()
-        except Exception as e:
-            logger.error(f"Error canceling timer task: {e}")
-        
-        # Store pause state
-        info["is_paused"] = True
-        info["paused_remaining"] = remaining
+        # Store pause state, then wake the current task so it exits without firing
+        info.is_paused = True
+        info.paused_remaining = remaining
+        info.event.set()
         logger.info(f"Timer paused for guild {guild_id} with {remaining}s remaining")
         
         # Sync to grimlive API
-        category_id = info.get("category_id")
-        asyncio.create_task(self._sync_timer_pause(guild_id, category_id))
+        category_id = info.category_id
+        self._sync('api/timer/pause', guild_id, category_id)
         
         return (True, f"⏸️ Timer paused with {remaining}s remaining.")
     
-    async def _sync_timer_pause(self, guild_id: int, category_id: int | None):
-        """Sync timer pause to grimlive API."""
-        session_code = await self._get_session_code(guild_id, category_id)
-        if session_code:
-            await self._call_grimlive_api('api/timer/pause', {
-                'sessionCode': session_code
-            })
-
     def resume_timer(self, guild_id: int, announce_channel: discord.TextChannel) -> tuple[bool, str]:
         """Resume a paused timer for a guild.
         
@@ -276,10 +319,10 @@ class TimerManager:
         if not info:
             return (False, "No timer to resume.")
         
-        if not info.get("is_paused"):
+        if not info.is_paused:
             return (False, "Timer is not paused.")
         
-        remaining = info.get("paused_remaining", 0)
+        remaining = info.paused_remaining
         if remaining <= 0:
             return (False, "No remaining time to resume.")
         
@@ -288,72 +331,68 @@ class TimerManager:
         if not guild:
             return (False, "Guild not found.")
         
-        category_id = info.get("category_id")
+        category_id = info.category_id
         
         # Create new task with remaining time
-        loop = asyncio.get_event_loop()
-        task = loop.create_task(self._timer_and_call(remaining, guild, announce_channel, category_id))
+        event = asyncio.Event()
+        deadline = time.monotonic() + remaining
+        task = asyncio.create_task(self._timer_and_call(deadline, guild, announce_channel, category_id, event))
         
         # Update timer info
-        info["task"] = task
-        info["end_time"] = time.time() + remaining
-        info["is_paused"] = False
-        info["paused_remaining"] = 0
+        info.task = task
+        info.event = event
+        info.end_time = time.time() + remaining
+        info.deadline = deadline
+        info.is_paused = False
+        info.paused_remaining = 0
         
         logger.info(f"Timer resumed for guild {guild_id} with {remaining}s remaining")
         
         # Sync to grimlive API
-        asyncio.create_task(self._sync_timer_resume(guild_id, category_id))
+        self._sync('api/timer/resume', guild_id, category_id)
         
         return (True, f"▶️ Timer resumed with {remaining}s remaining.")
     
-    async def _sync_timer_resume(self, guild_id: int, category_id: int | None):
-        """Sync timer resume to grimlive API."""
-        session_code = await self._get_session_code(guild_id, category_id)
-        if session_code:
-            await self._call_grimlive_api('api/timer/resume', {
-                'sessionCode': session_code
-            })
-    
-    def stop_timer(self, guild_id: int) -> tuple[bool, str]:
-        """Stop/cancel an active timer for a guild.
+    def cancel_timer(self, guild_id: int) -> TimerRecord | None:
+        """Cancel a guild's timer without firing it or syncing grimlive.
+        
+        Removes the entry, wakes its task and deletes the announce message. A
+        paused timer's task has already exited, so its DB row is dropped here;
+        otherwise the woken task drops it once it finds no entry.
         
         Returns:
-            (success, message) tuple
+            The cancelled TimerRecord, or None if the guild had no timer
         """
-        info = self.scheduled_timers.get(guild_id)
+        info = self.scheduled_timers.pop(guild_id, None)
         if not info:
-            return (False, "No active timer to stop.")
+            return None
         
-        # Cancel the task
-        try:
-            info["task"].cancel()
-        except Exception as e:
-            logger.error(f"Error canceling timer task: {e}")
+        info.event.set()
+        if info.is_paused:
+            asyncio.create_task(self.db.delete_timer(guild_id))
         
         # Delete announce message if exists
         try:
-            if info.get("announce_msg"):
-                asyncio.create_task(info["announce_msg"].delete())
+            if info.announce_msg:
+                asyncio.create_task(info.announce_msg.delete())
         except Exception as e:
             logger.error(f"Error deleting announce message: {e}")
         
-        category_id = info.get("category_id")
+        return info
+    
+    def stop_timer(self, guild_id: int) -> tuple[bool, str]:
+        """Stop/cancel an active timer for a guild.
         
-        # Remove from scheduled timers
-        self.scheduled_timers.pop(guild_id, None)
+        Returns:
+            (success, message) tuple
+        """
+        info = self.cancel_timer(guild_id)
+        if not info:
+            return (False, "No active timer to stop.")
         
         # Sync to grimlive API
-        asyncio.create_task(self._sync_timer_stop(guild_id, category_id))
+        self._sync('api/timer/stop', guild_id, info.category_id)
         
         logger.info(f"Timer stopped for guild {guild_id}")
         
         return (True, "❌ Timer cancelled.")
-    
-    async def _sync_timer_stop(self, guild_id: int, category_id: int | None):
-        """Sync timer stop to grimlive API."""
-        session_code = await self._get_session_code(guild_id, category_id)
-        if session_code:
-            await self._call_grimlive_api('api/timer/stop', {
-                'sessionCode': session_code
-            })
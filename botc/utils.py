@@ -14,11 +14,29 @@ from typing import Union, Optional
 from pathlib import Path
 
 import discord
-from botc.constants import PREFIX_ST, PREFIX_COST, PREFIX_BRB, PREFIX_SPEC
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from botc.constants import (
+    PREFIX_ST, PREFIX_COST, PREFIX_BRB, PREFIX_SPEC,
+    EMOJI_TROUBLE_BREWING, EMOJI_SECTS_AND_VIOLETS, EMOJI_BAD_MOON_RISING,
+)
 from botc.database import DatabaseError
 
 logger = logging.getLogger("botc_bot")
 
+# Duration parsing: one "<number><unit>" token, or any run of them ("1h 30m")
+_DURATION_SINGLE_RE = re.compile(r"(\d+)([dhms])")
+_DURATION_RE = re.compile(r"(\d+)\s*([dhms])?")
+_DURATION_UNITS = {'d': 86400, 'h': 3600, 'm': 60, 's': 1, None: 1}
+
+# Category names treated as the BOTC category when none is configured
+_BOTC_CATEGORY_NAMES = frozenset({"botc", "bot c", "🩸• blood on the clocktower", "blood on the clocktower"})
+
 
 def parse_duration(duration_str: str) -> int:
     """Parse a flexible duration string into seconds.
@@ -30,6 +48,10 @@ def parse_duration(duration_str: str) -> int:
     if not s:
         raise ValueError("empty duration")
 
+    # Bare seconds ("90") need no regex at all
+    if s.isdigit():
+        return int(s)
+
     # Colon formats: H:M:S or M:S
     if ':' in s:
         parts = s.split(':')
@@ -44,28 +66,15 @@ def parse_duration(duration_str: str) -> int:
             return hours * 3600 + minutes * 60 + secs
         raise ValueError("invalid colon duration")
 
-    total = 0
-    any_match = False
-    for m in re.finditer(r"(\d+)\s*(d|h|m|s)?", s):
-        any_match = True
-        val = int(m.group(1))
-        unit = m.group(2)
-        if not unit:
-            total += val
-        elif unit == 'd':
-            total += val * 86400
-        elif unit == 'h':
-            total += val * 3600
-        elif unit == 'm':
-            total += val * 60
-        elif unit == 's':
-            total += val
-
-    if any_match and total > 0:
-        return total
+    # Common single-unit form ("5m", "1h")
+    single = _DURATION_SINGLE_RE.fullmatch(s)
+    if single:
+        total = int(single[1]) * _DURATION_UNITS[single[2]]
+    else:
+        total = sum(int(m[1]) * _DURATION_UNITS[m[2]] for m in _DURATION_RE.finditer(s))
 
-    if s.isdigit():
-        return int(s)
+    if total > 0:
+        return total
 
     raise ValueError("could not parse duration")
 
@@ -97,10 +106,16 @@ def write_json_atomic(path: Path | str, data, *, indent: int = 2, ensure_ascii:
     """Write JSON to path atomically to avoid corruption on crash."""
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
+    # orjson always emits UTF-8 and only knows 2-space indentation; anything else goes through json
+    if ORJSON_AVAILABLE and not ensure_ascii and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        payload = orjson.dumps(data, option=option)
+    else:
+        payload = json.dumps(data, ensure_ascii=ensure_ascii, indent=indent).encode("utf-8")
     fd, tmp = tempfile.mkstemp(prefix=p.name, dir=str(p.parent))
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=ensure_ascii, indent=indent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
             f.flush()
             os.fsync(f.fileno())
         os.replace(tmp, str(p))
@@ -121,11 +136,12 @@ async def get_botc_category(guild: discord.Guild, db) -> Optional[discord.Catego
     guild_config = await db.get_guild(guild_id)
     if guild_config and guild_config.get("botc_category_id"):
         cfg_cat_id = guild_config["botc_category_id"]
-        botc_category = next((c for c in guild.categories if c.id == cfg_cat_id), None)
+        channel = guild.get_channel(cfg_cat_id)
+        botc_category = channel if isinstance(channel, discord.CategoryChannel) else None
     
     if not botc_category:
         for category in guild.categories:
-            if category.name and category.name.lower() in ["botc", "bot c", "🩸• blood on the clocktower", "blood on the clocktower"]:
+            if category.name and category.name.lower() in _BOTC_CATEGORY_NAMES:
                 botc_category = category
                 break
     
@@ -187,8 +203,6 @@ def strip_brb_prefix(nickname: str) -> str:
 
 def add_script_emoji(script_name: str) -> str:
     """Add emoji to script name if it's a base script."""
-    from botc.constants import EMOJI_TROUBLE_BREWING, EMOJI_SECTS_AND_VIOLETS, EMOJI_BAD_MOON_RISING
-    
     script_lower = script_name.lower()
     if 'trouble' in script_lower and 'brewing' in script_lower:
         return f"{EMOJI_TROUBLE_BREWING} {script_name}"
@@ -265,9 +279,8 @@ async def is_admin(member: Optional[discord.Member], db=None, *, interaction: di
     # Check for custom admin roles from database
     if db is not None:
         try:
-            admin_role_ids = await db.get_admin_roles(member.guild.id)
-            member_role_ids = [role.id for role in member.roles]
-            if any(role_id in admin_role_ids for role_id in member_role_ids):
+            admin_role_ids = await db.get_admin_role_set(member.guild.id)
+            if admin_role_ids and not admin_role_ids.isdisjoint(role.id for role in member.roles):
                 return True
         except Exception:
             pass
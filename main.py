@@ -16,6 +16,7 @@ from botc.announcements import AnnouncementProcessor
 from botc.cleanup import CleanupTask
 from botc.config import get_settings
 from botc.constants import (
+    ACTIVE_PLAYERS_CACHE_TTL,
     COMMAND_COOLDOWN_LONG,
     COMMAND_COOLDOWN_SECONDS,
     DELETABLE_COMMANDS,
@@ -23,7 +24,6 @@ from botc.constants import (
     DELETE_DELAY_LONG,
     DELETE_DELAY_NORMAL,
     DELETE_DELAY_QUICK,
-    EMOJI_BAD_MOON_RISING,
     EMOJI_BALANCE,
     EMOJI_CANDLE,
     EMOJI_CLOCK,
@@ -36,10 +36,8 @@ from botc.constants import (
     EMOJI_QUESTION,
     EMOJI_SCRIPT,
     EMOJI_SCROLL,
-    EMOJI_SECTS_AND_VIOLETS,
     EMOJI_STAR,
     EMOJI_SWORD,
-    EMOJI_TROUBLE_BREWING,
     MAX_NICK_LENGTH,
     PREFIX_BRB,
     PREFIX_COST,
@@ -96,10 +94,18 @@ intents.members = True
 
 bot = commands.Bot(command_prefix="*", intents=intents, help_command=None)
 
-db = Database(database_url)
+db = Database(
+    database_url,
+    min_size=settings.db_pool_min_size,
+    max_size=settings.db_pool_max_size,
+    timeout=settings.db_command_timeout,
+)
 
 follower_targets: dict[int, int] = {}
 last_player_snapshots: dict[tuple[int, Optional[int]], set[str]] = {}
+startgame_locks: dict[tuple[int, int], asyncio.Lock] = {}
+# guild_id -> {category_id: (computed_at, mentions, joined mentions)}; dropped on voice/nickname changes
+active_players_cache: dict[int, dict[Optional[int], tuple[float, list, str]]] = {}
 command_cooldowns: dict[int, dict[str, float]] = {}
 bot_initiated_nick_changes: set[tuple[int, str]] = set()
 
@@ -107,9 +113,14 @@ timer_manager: Optional[TimerManager] = None
 session_manager: Optional[SessionManager] = None
 
 
-async def get_active_players(
+async def _active_players_entry(
     guild: discord.Guild, channel: discord.TextChannel = None
-) -> list:
+) -> tuple[float, list, str]:
+    category_id = channel.category_id if channel else None
+    cached = active_players_cache.get(guild.id, {}).get(category_id)
+    if cached and time.time() - cached[0] < ACTIVE_PLAYERS_CACHE_TTL:
+        return cached
+
     active_player_mentions = []
 
     try:
@@ -134,8 +145,30 @@ async def get_active_players(
                     active_player_mentions.append(member.mention)
     except Exception as e:
         logger.warning(f"Error getting active players: {e}")
+        return (time.time(), active_player_mentions, " ".join(active_player_mentions))
+
+    entry = (time.time(), active_player_mentions, " ".join(active_player_mentions))
+    active_players_cache.setdefault(guild.id, {})[category_id] = entry
+    return entry
 
-    return active_player_mentions
+
+async def get_active_players(
+    guild: discord.Guild, channel: discord.TextChannel = None
+) -> list:
+    _, mentions, _ = await _active_players_entry(guild, channel)
+    return list(mentions)
+
+
+async def get_active_player_mention_text(
+    guild: discord.Guild, channel: discord.TextChannel = None
+) -> str:
+    """Active player mentions pre-joined for a message body ("" when nobody is playing)."""
+    _, _, mention_text = await _active_players_entry(guild, channel)
+    return mention_text
+
+
+def invalidate_active_players(guild_id: int) -> None:
+    active_players_cache.pop(guild_id, None)
 
 
 def check_bot_permissions(guild: discord.Guild) -> tuple[bool, bool]:
@@ -393,17 +426,6 @@ def check_rate_limit(
     return True
 
 
-def add_script_emoji(script_name: str) -> str:
-    script_lower = script_name.lower()
-    if "trouble" in script_lower and "brewing" in script_lower:
-        return f"{EMOJI_TROUBLE_BREWING} {script_name}"
-    elif "sects" in script_lower or "violet" in script_lower:
-        return f"{EMOJI_SECTS_AND_VIOLETS} {script_name}"
-    elif "bad" in script_lower and "moon" in script_lower:
-        return f"{EMOJI_BAD_MOON_RISING} {script_name}"
-    return script_name
-
-
 async def call_townspeople(
     guild: discord.Guild, category_id: Optional[int] = None
 ) -> tuple[int, discord.VoiceChannel]:
@@ -523,14 +545,15 @@ async def get_session_from_channel_wrapper(channel, session_manager):
     if (
         not session_manager
         or not channel
-        or not hasattr(channel, "category")
-        or not channel.category
+        or getattr(channel, "category_id", None) is None
     ):
         return None
     return await session_manager.get_session_from_channel(channel, channel.guild)
 
 
 bot.get_active_players = get_active_players
+bot.get_active_player_mention_text = get_active_player_mention_text
+bot.invalidate_active_players = invalidate_active_players
 bot.is_storyteller = is_storyteller
 bot.is_main_storyteller = is_main_storyteller
 bot.call_townspeople = call_townspeople
@@ -550,6 +573,7 @@ bot.get_player_role = get_player_role
 bot.strip_brb_prefix = strip_brb_prefix
 bot.check_bot_permissions = check_bot_permissions
 bot.last_player_snapshots = last_player_snapshots
+bot.startgame_locks = startgame_locks
 bot.follower_targets = follower_targets
 bot.clean_followers = clean_followers
 bot.bot_initiated_nick_changes = bot_initiated_nick_changes
@@ -596,66 +620,66 @@ async def stats_handler(interaction: discord.Interaction) -> None:
         guild = interaction.guild
         guild_id = guild.id
 
-        # Fetch all game history for accurate stats (no limit)
-        history = await db.get_game_history(guild_id, limit=None)
-
-        if not history:
-            await interaction.response.send_message(
-                "No game history recorded for this server yet.", ephemeral=True
-            )
-            return
-
-        # Filter out games without valid winners and clean them up
-        valid_history = []
+        # Stream all game history for accurate stats (no limit), aggregating as we go
+        has_history = False
         invalid_game_ids = []
-        for game in history:
+        recent_games = []  # Newest 10 valid games
+        total_games = 0
+        good_wins = 0
+        evil_wins = 0
+        scripts = {}
+        script_wins = {}
+        async for game in db.iter_game_history(guild_id):
+            has_history = True
             winner = game.get("winner")
-            if winner in ["Good", "Evil"]:
-                valid_history.append(game)
-            else:
+            if winner not in ["Good", "Evil"]:
                 # Mark invalid games for deletion
                 game_id = game.get("game_id")
                 if game_id:
                     invalid_game_ids.append(game_id)
+                continue
 
-        if invalid_game_ids:
-            for game_id in invalid_game_ids:
-                try:
-                    await db.delete_game_by_id(game_id)
-                    logger.info(f"Deleted invalid game (no winner): {game_id}")
-                except Exception as e:
-                    logger.error(f"Failed to delete invalid game {game_id}: {e}")
+            total_games += 1
+            if winner == "Good":
+                good_wins += 1
+            else:
+                evil_wins += 1
+            if len(recent_games) < 10:
+                recent_games.append(game)
 
-        history = valid_history
+            script = game.get("script", "Unknown")
+            if script in ["Custom Script", "Homebrew Script"]:
+                script = "Custom Script"
+            scripts[script] = scripts.get(script, 0) + 1
 
-        if not history:
+            if script not in script_wins:
+                script_wins[script] = {"Good": 0, "Evil": 0}
+            script_wins[script][winner] += 1
+
+        if not has_history:
+            await interaction.response.send_message(
+                "No game history recorded for this server yet.", ephemeral=True
+            )
+            return
+
+        # Clean up games without valid winners
+        if invalid_game_ids:
+            try:
+                deleted = await db.delete_games_by_ids(invalid_game_ids, guild_id)
+                logger.info(f"Deleted {deleted} invalid games (no winner): {invalid_game_ids}")
+            except Exception as e:
+                logger.error(f"Failed to delete invalid games {invalid_game_ids}: {e}")
+
+        if not total_games:
             await interaction.response.send_message(
                 "No valid game history found. Invalid games have been cleaned up.",
                 ephemeral=True,
             )
             return
 
-        total_games = len(history)
-        good_wins = sum(1 for g in history if g.get("winner") == "Good")
-        evil_wins = sum(1 for g in history if g.get("winner") == "Evil")
-
         good_rate = (good_wins / total_games * 100) if total_games > 0 else 0
         evil_rate = (evil_wins / total_games * 100) if total_games > 0 else 0
 
-        scripts = {}
-        script_wins = {}
-        for game in history:
-            script = game.get("script", "Unknown")
-            if script in ["Custom Script", "Homebrew Script"]:
-                script = "Custom Script"
-            scripts[script] = scripts.get(script, 0) + 1
-
-            winner = game.get("winner")
-            if script not in script_wins:
-                script_wins[script] = {"Good": 0, "Evil": 0}
-            if winner in ["Good", "Evil"]:
-                script_wins[script][winner] += 1
-
         embed = discord.Embed(
             title=f"{EMOJI_SCRIPT} Server Stats",
             description=f"Game stats for **{guild.name}**",
@@ -708,11 +732,10 @@ async def stats_handler(interaction: discord.Interaction) -> None:
 
         # Top storytellers (top 3)
         try:
-            st_stats = await db.get_storyteller_stats(guild_id)
+            st_stats = await db.get_storyteller_stats(guild_id, limit=3)
             if st_stats:
-                top_sts = st_stats[:3]
                 st_lines = []
-                for idx, st in enumerate(top_sts, 1):
+                for idx, st in enumerate(st_stats, 1):
                     st_id = st["storyteller_id"]
                     member = guild.get_member(st_id)
                     if member:
@@ -732,8 +755,7 @@ async def stats_handler(interaction: discord.Interaction) -> None:
             logger.warning(f"Could not fetch top storytellers: {e}")
 
         # Recent activity (last 10 games trend)
-        if len(history) >= 10:
-            recent_games = history[:10]  # Already sorted newest first
+        if len(recent_games) >= 10:
             recent_good = sum(1 for g in recent_games if g.get("winner") == "Good")
             recent_evil = sum(1 for g in recent_games if g.get("winner") == "Evil")
             recent_good_pct = recent_good / 10 * 100
@@ -974,9 +996,10 @@ async def storytellerstats_handler(
         # If looking up a specific user, get bot-wide stats and profile
         # Otherwise get guild-specific leaderboard
         if user:
-            stats = await db.get_storyteller_stats(None)  # Bot-wide
+            stats = await db.get_storyteller_stats(None, storyteller_id=user.id)  # Bot-wide
         else:
-            stats = await db.get_storyteller_stats(guild_id)  # Guild-specific
+            # Guild-specific; one row past the top 10 tells us whether there are more
+            stats = await db.get_storyteller_stats(guild_id, limit=11)
 
         if not stats:
             if user:
@@ -1078,7 +1101,7 @@ async def storytellerstats_handler(
 
             if len(stats) > 10:
                 embed.set_footer(
-                    text=f"Showing top 10 of {len(stats)} storytellers • v{VERSION}"
+                    text=f"Showing top 10 of 10+ storytellers • v{VERSION}"
                 )
             else:
                 embed.set_footer(
@@ -1179,7 +1202,7 @@ async def clearhistory_handler(interaction: discord.Interaction) -> None:
             return
 
         guild_id = guild.id
-        history = await db.get_game_history(guild_id, limit=None)
+        history = await db.get_game_history(guild_id, limit=1)
 
         if not history:
             await safe_send_interaction(
@@ -1526,10 +1549,12 @@ async def setup_hook():
 
     await db.connect()
     await db.initialize_schema()
+    await db.start_cache_listener()
     logger.info("Database connected and schema initialized")
 
     session_manager = SessionManager(db)
     bot.session_manager = session_manager
+    await session_manager.migrate_legacy_codes()
     logger.info("Session manager initialized")
 
     # Initialize announcement processor for website events
@@ -1545,6 +1570,19 @@ async def setup_hook():
     await load_cogs()
 
 
+_discord_close = bot.close
+
+
+async def close_bot() -> None:
+    """Release the timer manager's HTTP session before discord.py shuts down."""
+    if timer_manager:
+        await timer_manager.close()
+    await _discord_close()
+
+
+bot.close = close_bot
+
+
 @bot.event
 async def on_command_error(ctx, error):
     """Handle command errors - suppress CommandNotFound for on_message handled commands."""
@@ -0,0 +1,19 @@
+-- Notify listeners when DND users change so the bot can keep an in-process cache
+-- Safe to run multiple times (CREATE OR REPLACE / DROP IF EXISTS)
+
+CREATE OR REPLACE FUNCTION notify_dnd_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('dnd_change', '-' || OLD.user_id::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('dnd_change', '+' || NEW.user_id::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS dnd_users_notify ON dnd_users;
+
+CREATE TRIGGER dnd_users_notify
+AFTER INSERT OR DELETE ON dnd_users
+FOR EACH ROW EXECUTE FUNCTION notify_dnd_change();
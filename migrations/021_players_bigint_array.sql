@@ -0,0 +1,23 @@
+-- Store games.players as BIGINT[] instead of a JSONB list of user IDs
+-- Safe to run multiple times (conversion only runs while the column is still JSONB)
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'games' AND column_name = 'players' AND data_type = 'jsonb'
+    ) THEN
+        ALTER TABLE games ADD COLUMN IF NOT EXISTS players_ids BIGINT[] DEFAULT '{}';
+        UPDATE games
+        SET players_ids = ARRAY(
+            SELECT e::bigint FROM jsonb_array_elements_text(players) AS e
+            WHERE e ~ '^[0-9]+$'
+        )
+        WHERE players IS NOT NULL AND jsonb_typeof(players) = 'array';
+        ALTER TABLE games DROP COLUMN players;
+        ALTER TABLE games RENAME COLUMN players_ids TO players;
+    END IF;
+END $$;
+
+-- Fast "was this user in the game" lookups (players @> ARRAY[id])
+CREATE INDEX IF NOT EXISTS idx_games_players ON games USING GIN (players);
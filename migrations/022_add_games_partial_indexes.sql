@@ -0,0 +1,8 @@
+-- Partial indexes for the hot games predicates
+-- Safe to run multiple times (IF NOT EXISTS)
+
+-- Active game lookups: get_active_game, end_game, cancel_game, start_game deactivation
+CREATE INDEX IF NOT EXISTS games_active_idx ON games (guild_id, category_id) WHERE is_active;
+
+-- History listings: get_game_history, delete_game OFFSET walk
+CREATE INDEX IF NOT EXISTS games_history_idx ON games (guild_id, category_id, completed_at DESC) WHERE NOT is_active;
@@ -0,0 +1,19 @@
+-- Notify listeners when a guild row changes so the bot can invalidate its guild cache
+-- Safe to run multiple times (CREATE OR REPLACE / DROP IF EXISTS)
+
+CREATE OR REPLACE FUNCTION notify_guild_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('guild_change', OLD.guild_id::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('guild_change', NEW.guild_id::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS guilds_notify ON guilds;
+
+CREATE TRIGGER guilds_notify
+AFTER INSERT OR UPDATE OR DELETE ON guilds
+FOR EACH ROW EXECUTE FUNCTION notify_guild_change();
@@ -0,0 +1,7 @@
+-- Covering index for the per-guild storyteller leaderboard
+-- (WHERE guild_id = $1 ORDER BY games_run DESC) so it is an index-only scan with no sort
+-- Safe to run multiple times (IF NOT EXISTS)
+
+CREATE INDEX IF NOT EXISTS idx_storyteller_stats_guild_games
+ON storyteller_stats (guild_id, games_run DESC)
+INCLUDE (storyteller_id, good_wins, evil_wins, total_minutes);